@@ -9,10 +9,23 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import torch
 import numpy as np
+import hashlib
 import json
 import logging
+import queue
+import struct
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import nullcontext
 from dotenv import load_dotenv
 
+# ONNX Runtime es opcional: solo se requiere con INFERENCE_BACKEND=onnx
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
 # Cargar variables de entorno
 load_dotenv()
 
@@ -34,6 +47,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# La API solo hace inferencia: sin autograd en el hilo principal
+# (cada camino de inferencia usa además torch.inference_mode(), que es por hilo)
+torch.set_grad_enabled(False)
+
 app = Flask(__name__)
 
 # Configurar CORS desde variable de entorno
@@ -46,6 +63,12 @@ CORS(app, origins=cors_origins)
 MODEL_PATH = Path(os.getenv('MODEL_PATH', '../ml-service/trained_models/model_final.pth'))
 GESTURES_MAP_PATH = Path(os.getenv('GESTURES_MAP_PATH', '../ml-service/data/gestures_map.json'))
 NORMALIZATION_STATS_PATH = Path(os.getenv('NORMALIZATION_STATS_PATH', '../ml-service/trained_models/normalization_stats.pth'))
+ONNX_MODEL_PATH = Path(os.getenv('ONNX_MODEL_PATH', '../ml-service/trained_models/model_final.onnx'))
+
+# Backend de inferencia: torch (eager/TorchScript + CUDA Graphs), compile
+# (torch.compile/Inductor con CUDA Graphs propios) u onnx (ONNX Runtime)
+INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'torch').lower()
+ONNX_OPSET_VERSION = 17
 
 # Device configuration
 device_config = os.getenv('DEVICE', 'auto')
@@ -54,17 +77,76 @@ if device_config == 'auto':
 else:
     DEVICE = torch.device(device_config)
 
+# Hilos intra-op de PyTorch; con varios workers de Gunicorn en CPU conviene 1
+# para no sobresuscribir los cores (helen_util.start_api lo configura)
+torch_num_threads = int(os.getenv('TORCH_NUM_THREADS', 0))
+if torch_num_threads > 0:
+    torch.set_num_threads(torch_num_threads)
+
+# Forma fija de entrada del modelo (frames x features)
+SEQ_LENGTH = int(os.getenv('SEQ_LENGTH', 40))
+N_FEATURES = 126
+
+# CUDA Graphs: captura el forward completo y lo reproduce con un solo launch
+USE_CUDA_GRAPH = os.getenv('USE_CUDA_GRAPH', 'True').lower() == 'true'
+CUDA_GRAPH_WARMUP_ITERS = 3
+
+# TorchScript: script + freeze + optimize_for_inference para fusionar el head FC
+USE_TORCHSCRIPT = os.getenv('USE_TORCHSCRIPT', 'True').lower() == 'true'
+TORCHSCRIPT_WARMUP_ITERS = 2
+
+# Precisión de inferencia: fp32, fp16, bf16 o auto (fp16 en GPU, fp32 en CPU)
+INFERENCE_PRECISION = os.getenv('INFERENCE_PRECISION', 'auto').lower()
+AUTOCAST_DTYPES = {'fp16': torch.float16, 'bf16': torch.bfloat16}
+if INFERENCE_PRECISION == 'auto':
+    INFERENCE_PRECISION = 'fp16' if DEVICE.type == 'cuda' else 'fp32'
+AUTOCAST_DTYPE = AUTOCAST_DTYPES.get(INFERENCE_PRECISION)
+
+# Protocolo binario: cabecera (frames, features) como 2 x uint32 little-endian + valores
+# float32 (por defecto) o float16 con ?dtype=float16, que reduce el payload a la mitad
+BINARY_CONTENT_TYPE = 'application/octet-stream'
+BINARY_HEADER = struct.Struct('<II')
+BINARY_DTYPES = {'float32': np.dtype('<f4'), 'float16': np.dtype('<f2')}
+
+# Cuantización dinámica INT8 de Linear y LSTM (solo CPU)
+QUANTIZE_INT8 = os.getenv('QUANTIZE_INT8', 'False').lower() == 'true'
+
+# Micro-batching: agrupa requests concurrentes en un solo forward
+ENABLE_BATCHING = os.getenv('ENABLE_BATCHING', 'True').lower() == 'true'
+BATCH_MAX_SIZE = int(os.getenv('BATCH_MAX_SIZE', 16))
+BATCH_MAX_WAIT_MS = float(os.getenv('BATCH_MAX_WAIT_MS', 4))
+
+# Tamaños de batch con CUDA Graph capturado (potencias de 2 hasta BATCH_MAX_SIZE)
+CUDA_GRAPH_BATCH_SIZES = sorted(
+    {2 ** i for i in range(BATCH_MAX_SIZE.bit_length()) if 2 ** i <= BATCH_MAX_SIZE} | {BATCH_MAX_SIZE}
+)
+
 # Variables globales para el modelo
 MODEL = None
 GESTURES_INVERSE_MAP = {}  # {id_numerico: nombre_gesto}
 NORMALIZATION_STATS = None
+BATCHER = None
+ONNX_SESSION = None
+ONNX_NORMALIZATION = None  # (mean, std) como np.ndarray para el backend onnx
+
+# Grafos CUDA capturados: {batch_size: (grafo, entrada_estática, salida_estática)}
+CUDA_GRAPHS = {}
+
+# Buffers de entrada reutilizados entre requests (solo en cuda):
+# HOST_BUFFER en memoria pinned para copias H2D asíncronas y DEVICE_BUFFER,
+# cuyas vistas [:batch_size] son las entradas estáticas de los grafos
+HOST_BUFFER = None
+DEVICE_BUFFER = None
+
+# Serializa el acceso al modelo y a los buffers estáticos entre hilos de Flask
+INFERENCE_LOCK = threading.Lock()
 
 
 def load_model_and_config():
     """
     Carga el modelo entrenado y configuraciones al iniciar Flask
     """
-    global MODEL, GESTURES_INVERSE_MAP, NORMALIZATION_STATS
+    global MODEL, GESTURES_INVERSE_MAP, NORMALIZATION_STATS, ONNX_SESSION, ONNX_NORMALIZATION
     
     try:
         logger.info("=" * 70)
@@ -101,13 +183,47 @@ def load_model_and_config():
         
         logger.info(f"🧠 Cargando modelo desde: {MODEL_PATH}")
         logger.info(f"🖥️  Usando device: {DEVICE}")
+        logger.info(f"🎚️  Precisión de inferencia: {INFERENCE_PRECISION}")
         
         MODEL = GestureNet(output_size=n_classes).to(DEVICE)
         MODEL.load_state_dict(torch.load(MODEL_PATH, map_location=DEVICE))
-        MODEL.eval()
         
         logger.info(f"✅ Modelo cargado exitosamente")
         logger.info(f"📐 Arquitectura: {MODEL.get_model_info()}")
+        
+        # eval + BatchNorm absorbida en la primera Linear + Dropout -> Identity
+        MODEL.prepare_for_inference()
+        
+        # ONNX Runtime reemplaza todo el camino de PyTorch (TorchScript, CUDA Graphs)
+        if INFERENCE_BACKEND == 'onnx':
+            ONNX_SESSION = load_onnx_session(MODEL)
+            if NORMALIZATION_STATS is not None:
+                ONNX_NORMALIZATION = (
+                    NORMALIZATION_STATS['mean'].cpu().numpy(),
+                    NORMALIZATION_STATS['std'].cpu().numpy()
+                )
+            logger.info("=" * 70)
+            return
+        
+        # Pesos INT8 para Linear/LSTM en CPU (VNNI): ~4x menos memoria y ancho de banda
+        if QUANTIZE_INT8 and DEVICE.type == 'cpu':
+            MODEL = MODEL.quantize()
+            logger.info("⚡ Modelo cuantizado a INT8 (dinámico: Linear + LSTM)")
+        
+        # 4. Compilar: torch.compile (Inductor) o TorchScript (fusiona Linear+ReLU,
+        #    elimina dispatch de Python)
+        if INFERENCE_BACKEND == 'compile':
+            MODEL = compile_model(MODEL)
+        elif USE_TORCHSCRIPT:
+            MODEL = script_model(MODEL)
+        
+        # 5. Reservar buffers estáticos y capturar CUDA Graph para la forma fija
+        #    (con compile, el modo reduce-overhead ya usa CUDA Graphs internamente)
+        if DEVICE.type == 'cuda':
+            allocate_static_buffers()
+            if USE_CUDA_GRAPH and INFERENCE_BACKEND == 'torch':
+                capture_cuda_graph()
+        
         logger.info("=" * 70)
         
     except Exception as e:
@@ -116,6 +232,414 @@ def load_model_and_config():
         raise
 
 
+def inference_context():
+    """
+    Contexto de autocast para la precisión configurada
+    
+    Los parámetros se mantienen en FP32; autocast ejecuta los GEMM del LSTM y
+    de las capas Linear en FP16/BF16 (Tensor Cores) y deja BN en FP32.
+    """
+    if AUTOCAST_DTYPE is None:
+        return nullcontext()
+    return torch.autocast(device_type=DEVICE.type, dtype=AUTOCAST_DTYPE)
+
+
+def load_onnx_session(model):
+    """
+    Crea una sesión de ONNX Runtime, exportando el modelo si hace falta
+    
+    El export se regenera cuando falta o es más viejo que MODEL_PATH. En CPU,
+    ONNX Runtime ejecuta el LSTM bidireccional con kernels fusionados de
+    oneDNN, bastante más rápido que el LSTM eager de PyTorch.
+    
+    Returns:
+        onnxruntime.InferenceSession
+    """
+    if ort is None:
+        raise ImportError("INFERENCE_BACKEND=onnx requiere el paquete onnxruntime")
+    
+    if not ONNX_MODEL_PATH.exists() or ONNX_MODEL_PATH.stat().st_mtime < MODEL_PATH.stat().st_mtime:
+        logger.info(f"📦 Exportando modelo a ONNX: {ONNX_MODEL_PATH}")
+        dummy_input = torch.zeros(1, SEQ_LENGTH, N_FEATURES, device=DEVICE)
+        torch.onnx.export(
+            model, dummy_input, str(ONNX_MODEL_PATH),
+            input_names=['x'],
+            output_names=['logits'],
+            dynamic_axes={'x': {0: 'batch'}, 'logits': {0: 'batch'}},
+            opset_version=ONNX_OPSET_VERSION
+        )
+    
+    providers = ['CPUExecutionProvider']
+    if DEVICE.type == 'cuda' and 'CUDAExecutionProvider' in ort.get_available_providers():
+        providers.insert(0, 'CUDAExecutionProvider')
+    
+    session = ort.InferenceSession(str(ONNX_MODEL_PATH), providers=providers)
+    logger.info(f"⚡ Sesión ONNX Runtime lista ({', '.join(session.get_providers())})")
+    return session
+
+
+def run_onnx(landmarks_array):
+    """Normaliza en NumPy y ejecuta la sesión ONNX, retornando logits"""
+    if ONNX_NORMALIZATION is not None:
+        mean, std = ONNX_NORMALIZATION
+        landmarks_array = (landmarks_array - mean) / std
+    
+    return ONNX_SESSION.run(None, {'x': np.ascontiguousarray(landmarks_array, dtype=np.float32)})[0]
+
+
+def batch_bucket(batch_size):
+    """Menor tamaño de CUDA_GRAPH_BATCH_SIZES que admite batch_size (None si ninguno)"""
+    return next((b for b in CUDA_GRAPH_BATCH_SIZES if b >= batch_size), None)
+
+
+def compile_model(model):
+    """
+    Compila el modelo con torch.compile (Inductor, mode='reduce-overhead')
+    
+    Inductor fusiona la cadena del head FC y, en GPU, reduce-overhead captura
+    CUDA Graphs por sí mismo, por lo que no se combina con capture_cuda_graph.
+    Con dynamic=False se especializa un grafo por forma: se precalientan los
+    tamaños de CUDA_GRAPH_BATCH_SIZES y run_model rellena cada batch al
+    tamaño más cercano para no recompilar en producción.
+    
+    Returns:
+        El módulo compilado, o el modelo original si la compilación falla
+    """
+    try:
+        # El precalentamiento corre bajo el mismo autocast que las predicciones
+        with inference_context():
+            compiled = model.compile_for_inference(
+                batch_sizes=CUDA_GRAPH_BATCH_SIZES,
+                seq_length=SEQ_LENGTH,
+                device=DEVICE,
+                fullgraph=True
+            )
+        
+        logger.info(f"⚡ Modelo compilado con torch.compile para batch sizes {CUDA_GRAPH_BATCH_SIZES}")
+        return compiled
+    
+    except Exception as e:
+        logger.warning(f"⚠️  No se pudo compilar con torch.compile, usando modo eager: {e}")
+        return model
+
+
+def torchscript_cache_path():
+    """
+    Ruta del módulo TorchScript cacheado junto a MODEL_PATH
+    
+    optimize_for_inference genera un grafo específico del device (y de la
+    cuantización), así que ambos forman parte del nombre del archivo.
+    """
+    suffix = DEVICE.type + ('.int8' if QUANTIZE_INT8 and DEVICE.type == 'cpu' else '')
+    return MODEL_PATH.with_name(f"{MODEL_PATH.stem}.{suffix}.script.pt")
+
+
+def torchscript_cache_key():
+    """
+    Huella de todo lo que queda congelado dentro del módulo TorchScript
+    
+    Contenido de MODEL_PATH y NORMALIZATION_STATS_PATH, forma de entrada y
+    versión de torch. Se compara por contenido y no por mtime: una copia que
+    preserva timestamps (cp -p, shutil.copy2) no debe reutilizar un grafo viejo.
+    
+    Returns:
+        str: Hash sha256 en hexadecimal
+    """
+    digest = hashlib.sha256()
+    for path in (MODEL_PATH, NORMALIZATION_STATS_PATH):
+        if path.exists():
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+        digest.update(b'\0')
+    digest.update(f"{SEQ_LENGTH}x{N_FEATURES}|torch={torch.__version__}".encode())
+    return digest.hexdigest()
+
+
+def script_model(model):
+    """
+    Convierte el modelo a TorchScript congelado y optimizado para inferencia
+    
+    torch.jit.freeze inlinea pesos y elimina los Dropout (eval), y
+    optimize_for_inference fusiona las cadenas Linear/ReLU/bias del head FC.
+    El resultado se guarda en torchscript_cache_path() y se reutiliza en los
+    siguientes arranques mientras su .key coincida con torchscript_cache_key(),
+    evitando repetir la compilación. Se hace warmup con la forma de producción para
+    que el fuser especialice el grafo antes de la primera request real.
+    
+    Returns:
+        El módulo optimizado, o el modelo original si el scripting falla
+    """
+    cache_path = torchscript_cache_path()
+    key_path = cache_path.with_name(cache_path.name + '.key')
+    cache_key = torchscript_cache_key()
+    
+    try:
+        with torch.no_grad():
+            if (cache_path.exists() and key_path.exists()
+                    and key_path.read_text().strip() == cache_key):
+                scripted = torch.jit.load(str(cache_path), map_location=DEVICE)
+                logger.info(f"📦 TorchScript cargado desde caché: {cache_path}")
+            else:
+                scripted = torch.jit.script(model.eval())
+                scripted = torch.jit.freeze(scripted)
+                scripted = torch.jit.optimize_for_inference(scripted)
+                
+                try:
+                    torch.jit.save(scripted, str(cache_path))
+                    key_path.write_text(cache_key)
+                    logger.info(f"💾 TorchScript guardado en caché: {cache_path}")
+                except OSError as e:
+                    logger.warning(f"⚠️  No se pudo guardar la caché de TorchScript: {e}")
+            
+            example_input = torch.zeros(1, SEQ_LENGTH, N_FEATURES, device=DEVICE)
+            with inference_context():
+                for _ in range(TORCHSCRIPT_WARMUP_ITERS):
+                    scripted(example_input)
+        
+        logger.info("⚡ Modelo compilado con TorchScript (freeze + optimize_for_inference)")
+        return scripted
+    
+    except Exception as e:
+        logger.warning(f"⚠️  No se pudo compilar con TorchScript, usando modo eager: {e}")
+        return model
+
+
+def allocate_static_buffers():
+    """
+    Reserva una sola vez los buffers de entrada en host (pinned) y en GPU
+    
+    Evita un cudaMalloc y una copia síncrona por request: cada predicción
+    copia a HOST_BUFFER y de ahí a DEVICE_BUFFER con non_blocking=True.
+    """
+    global HOST_BUFFER, DEVICE_BUFFER
+    
+    max_rows = max(CUDA_GRAPH_BATCH_SIZES)
+    HOST_BUFFER = torch.zeros(max_rows, SEQ_LENGTH, N_FEATURES, pin_memory=True)
+    DEVICE_BUFFER = torch.zeros_like(HOST_BUFFER, device=DEVICE)
+
+
+def normalize(landmarks_tensor):
+    """Aplica la normalización z-score del entrenamiento si está disponible"""
+    if NORMALIZATION_STATS is None:
+        return landmarks_tensor
+    return (landmarks_tensor - NORMALIZATION_STATS['mean']) / NORMALIZATION_STATS['std']
+
+
+def capture_cuda_graph():
+    """
+    Captura el forward del modelo en un torch.cuda.CUDAGraph por cada tamaño de batch
+    
+    El modelo es pequeño y cada forward lanza muchos kernels (LSTM, BN, FC),
+    por lo que el overhead de dispatch en CPU domina la latencia. Con el grafo
+    capturado, cada predicción es un único replay sobre buffers estáticos.
+    Se captura un grafo por tamaño en CUDA_GRAPH_BATCH_SIZES para que el
+    batcher pueda reproducir batches de distinto tamaño.
+    """
+    torch.backends.cudnn.benchmark = True
+    
+    # La captura se hace bajo autocast para que el grafo incluya los casts,
+    # y la normalización queda dentro del grafo
+    with torch.inference_mode(), inference_context():
+        for batch_size in CUDA_GRAPH_BATCH_SIZES:
+            static_input = DEVICE_BUFFER[:batch_size]
+            
+            # Warmup en un stream lateral (requerido antes de capturar)
+            side_stream = torch.cuda.Stream()
+            side_stream.wait_stream(torch.cuda.current_stream())
+            with torch.cuda.stream(side_stream):
+                for _ in range(CUDA_GRAPH_WARMUP_ITERS):
+                    MODEL(normalize(static_input))
+            torch.cuda.current_stream().wait_stream(side_stream)
+            
+            graph = torch.cuda.CUDAGraph()
+            with torch.cuda.graph(graph):
+                static_output = MODEL(normalize(static_input)).float()
+            
+            CUDA_GRAPHS[batch_size] = (graph, static_input, static_output)
+    
+    logger.info(f"⚡ CUDA Graphs capturados para batch sizes {CUDA_GRAPH_BATCH_SIZES}")
+
+
+def run_model(landmarks_tensor):
+    """
+    Normaliza y ejecuta el modelo sobre un tensor en DEVICE
+    
+    Si existe un CUDA Graph capturado que admita este batch, reproduce el
+    grafo (que ya incluye la normalización) sobre DEVICE_BUFFER, copiando la
+    entrada solo si no está ya en él; las filas sobrantes se ignoran. En otro
+    caso usa el forward normal (con compile, rellenando al tamaño precompilado).
+    """
+    batch_size = landmarks_tensor.shape[0]
+    bucket = batch_bucket(batch_size)
+    
+    if CUDA_GRAPHS and landmarks_tensor.shape[1:] == (SEQ_LENGTH, N_FEATURES):
+        if bucket is not None:
+            graph, static_input, static_output = CUDA_GRAPHS[bucket]
+            if landmarks_tensor.data_ptr() != static_input.data_ptr():
+                static_input[:batch_size].copy_(landmarks_tensor, non_blocking=True)
+            graph.replay()
+            return static_output[:batch_size].clone()
+    
+    if INFERENCE_BACKEND == 'compile' and bucket is not None and bucket != batch_size:
+        padding = landmarks_tensor.new_zeros((bucket - batch_size,) + tuple(landmarks_tensor.shape[1:]))
+        landmarks_tensor = torch.cat([landmarks_tensor, padding])
+    
+    with inference_context():
+        return MODEL(normalize(landmarks_tensor))[:batch_size].float()
+
+
+def predict_probabilities(landmarks_array):
+    """
+    Ejecuta el modelo y aplica softmax sobre un batch de secuencias sin normalizar
+    
+    Args:
+        landmarks_array (np.ndarray): Secuencias con forma (batch, seq_length, 126)
+    
+    Returns:
+        np.ndarray: Probabilidades con forma (batch, n_classes)
+    """
+    batch_size = landmarks_array.shape[0]
+    
+    if ONNX_SESSION is not None:
+        logits = run_onnx(landmarks_array)
+        exp_logits = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return exp_logits / exp_logits.sum(axis=1, keepdims=True)
+    
+    with INFERENCE_LOCK, torch.inference_mode():
+        landmarks_tensor = torch.from_numpy(np.ascontiguousarray(landmarks_array, dtype=np.float32))
+        
+        if (DEVICE_BUFFER is not None and batch_size <= DEVICE_BUFFER.shape[0]
+                and landmarks_tensor.shape[1:] == DEVICE_BUFFER.shape[1:]):
+            # Reutilizar buffers estáticos: host pinned -> GPU sin bloquear
+            HOST_BUFFER[:batch_size].copy_(landmarks_tensor)
+            DEVICE_BUFFER[:batch_size].copy_(HOST_BUFFER[:batch_size], non_blocking=True)
+            landmarks_tensor = DEVICE_BUFFER[:batch_size]
+        else:
+            landmarks_tensor = landmarks_tensor.to(DEVICE)
+        
+        output = run_model(landmarks_tensor)
+        probabilities = torch.softmax(output, dim=1)
+        
+        # La copia D2H sincroniza el stream dentro del lock: la copia non_blocking
+        # desde HOST_BUFFER ya terminó antes de que otra request pueda sobrescribirlo
+        return probabilities.cpu().numpy()
+
+
+class PredictionBatcher:
+    """
+    Agrupa requests concurrentes de /predict en un único forward
+    
+    A batch=1 el costo del LSTM es casi todo overhead de lanzamiento, así que
+    un hilo en segundo plano junta hasta BATCH_MAX_SIZE secuencias dentro de
+    una ventana de BATCH_MAX_WAIT_MS, las ejecuta juntas y resuelve el Future
+    de cada request con su porción del resultado.
+    """
+    
+    def __init__(self, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._worker_loop, name='prediction-batcher', daemon=True)
+    
+    def start(self):
+        """Inicia el hilo del batcher"""
+        self._thread.start()
+        logger.info(f"📦 Batcher iniciado (max {self.max_batch_size} secuencias, ventana {self.max_wait * 1000:.1f} ms)")
+    
+    def submit(self, landmarks_array):
+        """
+        Encola un batch de secuencias (batch, seq_length, 126)
+        
+        Returns:
+            Future: Se resuelve con las probabilidades (batch, n_classes)
+        """
+        future = Future()
+        self._queue.put((landmarks_array, future))
+        return future
+    
+    def _collect(self):
+        """Bloquea hasta la primera request y junta más dentro de la ventana"""
+        items = [self._queue.get()]
+        n_rows = items[0][0].shape[0]
+        deadline = time.monotonic() + self.max_wait
+        
+        while n_rows < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            items.append(item)
+            n_rows += item[0].shape[0]
+        
+        return items
+    
+    def _worker_loop(self):
+        while True:
+            items = self._collect()
+            
+            # Solo se pueden apilar secuencias con la misma forma (seq_length, features)
+            groups = {}
+            for array, future in items:
+                groups.setdefault(array.shape[1:], []).append((array, future))
+            
+            for group in groups.values():
+                arrays = [array for array, _ in group]
+                try:
+                    probabilities = predict_probabilities(np.concatenate(arrays, axis=0))
+                except Exception as e:
+                    for _, future in group:
+                        future.set_exception(e)
+                    continue
+                
+                offset = 0
+                for array, future in group:
+                    future.set_result(probabilities[offset:offset + array.shape[0]])
+                    offset += array.shape[0]
+
+
+def share_model_memory():
+    """
+    Mueve pesos y buffers del modelo a memoria compartida antes del fork
+    
+    Con varios workers de Gunicorn en CPU, los workers heredan estos
+    tensores en lugar de cargar cada uno su propia copia de model_final.pth.
+    Los módulos congelados o cuantizados no exponen sus pesos como
+    parámetros; en ese caso se comparten vía copy-on-write del fork.
+    """
+    if MODEL is None or DEVICE.type != 'cpu':
+        return
+    
+    tensors = list(MODEL.parameters()) + list(MODEL.buffers())
+    for tensor in tensors:
+        tensor.share_memory_()
+    
+    if NORMALIZATION_STATS is not None:
+        for tensor in NORMALIZATION_STATS.values():
+            tensor.share_memory_()
+    
+    logger.info(f"🔗 {len(tensors)} tensores del modelo en memoria compartida")
+
+
+def start_batcher(concurrent_requests=True):
+    """
+    Crea e inicia el batcher global si está habilitado
+    
+    Args:
+        concurrent_requests (bool): False si el worker atiende una request a la vez
+            (Gunicorn sync): no puede llegar una segunda durante la ventana, así que
+            el batcher no espera BATCH_MAX_WAIT_MS y despacha cada request al llegar
+    """
+    global BATCHER
+    
+    if ENABLE_BATCHING and BATCHER is None:
+        BATCHER = PredictionBatcher(max_wait_ms=BATCH_MAX_WAIT_MS if concurrent_requests else 0)
+        BATCHER.start()
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """
@@ -125,10 +649,50 @@ def health_check():
         "status": "healthy",
         "model_loaded": MODEL is not None,
         "device": str(DEVICE),
+        "backend": INFERENCE_BACKEND,
+        "cuda_graph": bool(CUDA_GRAPHS),
+        "batching": BATCHER is not None,
         "n_gestures": len(GESTURES_INVERSE_MAP)
     }), 200
 
 
+def parse_binary_landmarks(body, dtype='float32'):
+    """
+    Decodifica un payload binario de landmarks sin pasar por listas de Python
+    
+    Formato: cabecera BINARY_HEADER con (frames, features) seguida de
+    frames * features valores little-endian del tipo indicado.
+    
+    Args:
+        body (bytes): Cuerpo del request
+        dtype (str): 'float32' o 'float16' (ver BINARY_DTYPES)
+    
+    Returns:
+        np.ndarray: Secuencia float32 con forma (frames, features)
+    """
+    if dtype not in BINARY_DTYPES:
+        raise ValueError(f"dtype no soportado: {dtype} (usa {', '.join(BINARY_DTYPES)})")
+    value_dtype = BINARY_DTYPES[dtype]
+    
+    if len(body) < BINARY_HEADER.size:
+        raise ValueError("Payload binario sin cabecera de forma")
+    
+    n_frames, n_features = BINARY_HEADER.unpack_from(body)
+    expected_size = BINARY_HEADER.size + n_frames * n_features * value_dtype.itemsize
+    if len(body) != expected_size:
+        raise ValueError(
+            f"Payload binario de {len(body)} bytes, esperado {expected_size} para ({n_frames}, {n_features})"
+        )
+    
+    if value_dtype.itemsize == 2:
+        # float16 -> float32: astype ya crea un buffer nuevo y escribible
+        values = np.frombuffer(body, dtype=value_dtype, offset=BINARY_HEADER.size)
+        return values.astype(np.float32).reshape(n_frames, n_features)
+    
+    # bytearray: buffer escribible para que torch.from_numpy no tenga que copiar
+    return np.frombuffer(bytearray(body), dtype=value_dtype, offset=BINARY_HEADER.size).reshape(n_frames, n_features)
+
+
 @app.route('/predict', methods=['POST'])
 def predict():
     """
@@ -140,6 +704,9 @@ def predict():
             "return_probabilities": false  # Opcional
         }
     
+    O bien un body application/octet-stream (ver parse_binary_landmarks) con
+    ?return_probabilities=true y ?dtype=float16 como query params opcionales.
+    
     Retorna:
         {
             "gesture": "nombre_gesto",
@@ -147,8 +714,6 @@ def predict():
             "probabilities": {...}  # Opcional si return_probabilities=true
         }
     """
-    global MODEL, NORMALIZATION_STATS
-    
     try:
         # Validar que el modelo esté cargado
         if MODEL is None:
@@ -156,17 +721,26 @@ def predict():
             return jsonify({"error": "Modelo no cargado"}), 500
         
         # Obtener datos del request
-        data = request.get_json()
-        
-        if 'landmarks' not in data:
-            logger.warning("⚠️  Request sin campo 'landmarks'")
-            return jsonify({"error": "Falta campo 'landmarks' en el request"}), 400
-        
-        landmarks = data['landmarks']
-        return_probabilities = data.get('return_probabilities', False)
-        
-        # Convertir a numpy array y validar dimensiones
-        landmarks_array = np.array(landmarks, dtype=np.float32)
+        if request.mimetype == BINARY_CONTENT_TYPE:
+            try:
+                landmarks_array = parse_binary_landmarks(
+                    request.get_data(), request.args.get('dtype', 'float32').lower()
+                )
+            except ValueError as e:
+                logger.warning(f"⚠️  Payload binario inválido: {e}")
+                return jsonify({"error": str(e)}), 400
+            return_probabilities = request.args.get('return_probabilities', 'false').lower() == 'true'
+        else:
+            data = request.get_json()
+            
+            if 'landmarks' not in data:
+                logger.warning("⚠️  Request sin campo 'landmarks'")
+                return jsonify({"error": "Falta campo 'landmarks' en el request"}), 400
+            
+            return_probabilities = data.get('return_probabilities', False)
+            
+            # Convertir a numpy array en una sola pasada
+            landmarks_array = np.asarray(data['landmarks'], dtype=np.float32)
         
         # Validar forma: debe ser (seq_length, 126) o (1, seq_length, 126)
         if landmarks_array.ndim == 2:
@@ -179,21 +753,14 @@ def predict():
                 "error": f"Esperado 126 features por frame, recibido {landmarks_array.shape[-1]}"
             }), 400
         
-        # Convertir a tensor
-        landmarks_tensor = torch.FloatTensor(landmarks_array).to(DEVICE)
-        
-        # Normalizar si tenemos las estadísticas
-        if NORMALIZATION_STATS is not None:
-            mean = NORMALIZATION_STATS['mean'].to(DEVICE)
-            std = NORMALIZATION_STATS['std'].to(DEVICE)
-            landmarks_tensor = (landmarks_tensor - mean) / std
+        # Predicción (a través del batcher si está activo)
+        if BATCHER is not None:
+            probabilities = BATCHER.submit(landmarks_array).result()
+        else:
+            probabilities = predict_probabilities(landmarks_array)
         
-        # Predicción
-        with torch.no_grad():
-            output = MODEL(landmarks_tensor)
-            probabilities = torch.softmax(output, dim=1)
-            predicted_class = torch.argmax(probabilities, dim=1).item()
-            confidence = probabilities[0, predicted_class].item()
+        predicted_class = int(np.argmax(probabilities[0]))
+        confidence = probabilities[0, predicted_class]
         
         # Obtener nombre del gesto
         gesture_name = GESTURES_INVERSE_MAP.get(predicted_class, "unknown")
@@ -210,7 +777,7 @@ def predict():
         # Agregar probabilidades si se solicitan
         if return_probabilities:
             probs_dict = {
-                GESTURES_INVERSE_MAP[i]: float(probabilities[0, i].item())
+                GESTURES_INVERSE_MAP[i]: float(probabilities[0, i])
                 for i in range(len(GESTURES_INVERSE_MAP))
             }
             response["probabilities"] = probs_dict
@@ -230,13 +797,16 @@ def get_gestures():
     return jsonify({
         "gestures": list(GESTURES_INVERSE_MAP.values()),
         "n_gestures": len(GESTURES_INVERSE_MAP),
-        "gestures_map": GESTURES_INVERSE_MAP
+        "gestures_map": GESTURES_INVERSE_MAP,
+        "seq_length": SEQ_LENGTH,
+        "n_features": N_FEATURES
     }), 200
 
 
 if __name__ == '__main__':
     # Cargar modelo al iniciar
     load_model_and_config()
+    start_batcher()
     
     # Obtener configuración del servidor desde .env
     host = os.getenv('HOST', '0.0.0.0')
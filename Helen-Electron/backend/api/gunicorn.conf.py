@@ -0,0 +1,51 @@
+"""
+Configuración de Gunicorn para Helen API
+
+En GPU el modelo se carga en cada worker después del fork: el contexto CUDA
+no sobrevive a fork(). En CPU con varios workers (PRELOAD_MODEL=True) se
+carga una sola vez en el master, con los pesos en memoria compartida, y los
+workers los heredan al hacer fork; si el device resulta ser CUDA, PRELOAD_MODEL
+se ignora con un aviso y cada worker carga su modelo. El batcher siempre es un
+hilo propio de cada worker.
+"""
+
+import os
+
+PRELOAD_MODEL = os.getenv('PRELOAD_MODEL', 'False').lower() == 'true'
+
+# Importa api_service en el master antes del fork
+preload_app = PRELOAD_MODEL
+
+# Lo fija when_ready en el master; los workers lo heredan con el fork
+model_preloaded = False
+
+
+def when_ready(server):
+    """Carga el modelo en el master (solo con PRELOAD_MODEL y device CPU)"""
+    global model_preloaded
+    
+    if not PRELOAD_MODEL:
+        return
+    
+    import api_service
+    
+    if api_service.DEVICE.type != 'cpu':
+        server.log.warning(
+            f"PRELOAD_MODEL ignorado con DEVICE={api_service.DEVICE}: "
+            "CUDA no sobrevive a fork(), el modelo se carga en cada worker"
+        )
+        return
+    
+    api_service.load_model_and_config()
+    api_service.share_model_memory()
+    model_preloaded = True
+
+
+def post_fork(server, worker):
+    """Carga modelo (si no se precargó), CUDA Graphs y batcher dentro del worker"""
+    import api_service
+    
+    if not model_preloaded:
+        api_service.load_model_and_config()
+    # El worker sync atiende una request a la vez: el batcher no debe esperar a otra
+    api_service.start_batcher(concurrent_requests=worker.__class__.__name__ != 'SyncWorker')
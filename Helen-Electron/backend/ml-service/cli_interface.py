@@ -1,6 +1,9 @@
 from typing import Dict, Tuple
 from model.interfaces import IUserInterface
 
+# Separador de secciones del menú, construido una sola vez
+SEPARADOR = " <|" + "-" * 66 + "|>"
+
 
 class TerminalUI(IUserInterface):
     """
@@ -10,9 +13,9 @@ class TerminalUI(IUserInterface):
     
     def show_menu(self) -> str:
         """Muestra el menú principal y retorna la opción seleccionada"""
-        print("\n" + " <|" + "-" * 66 + "|>")
+        print("\n" + SEPARADOR)
         print("                 GESTIÓN Y ENTRENAMIENTO DEL MODELO HELEN")
-        print(" <|" + "-" * 66 + "|>")
+        print(SEPARADOR)
         print("\n                               OPCIONES:" + "\n")
         print("  1. Entrenar modelo con GESTOS ACTUALES")
         print("  2. Agregar NUEVO GESTO, grabar y actualizar mapeo")
@@ -20,16 +23,16 @@ class TerminalUI(IUserInterface):
         print("  4. PROBAR MODELO EN VIVO con cámara")
         print("  5. Ver GESTOS REGISTRADOS")
         print("  6. Salir")
-        print("\n" + " <|" + "-" * 66 + "|>")
+        print("\n" + SEPARADOR)
         
         choice = input("\n <|------------------ Seleccione una opción (1-6): ------------------|> ").strip()
         return choice
     
     def get_training_params(self) -> Dict[str, any]:
         """Solicita parámetros de entrenamiento al usuario"""
-        print("\n" + " <|" + "-" * 66 + "|>")
+        print("\n" + SEPARADOR)
         print("                     CONFIGURACIÓN DE ENTRENAMIENTO")
-        print(" <|" + "-" * 66 + "|>" + "\n")
+        print(SEPARADOR + "\n")
         
         epochs_input = input("  Número de épocas (default: 30): ").strip()
         epochs = int(epochs_input) if epochs_input else 30
@@ -44,9 +47,9 @@ class TerminalUI(IUserInterface):
     
     def get_gesture_info(self) -> Tuple[str, str]:
         """Obtiene información para agregar un nuevo gesto"""
-        print("\n" + " <|" + "-" * 66 + "|>")
+        print("\n" + SEPARADOR)
         print("                        AGREGAR NUEVO GESTO")
-        print(" <|" + "-" * 66 + "|>" + "\n")
+        print(SEPARADOR + "\n")
         gesture_name = input("  Nombre del gesto (ej: 'hola'): ").strip().lower()
         dataset_path = input("  Ruta al dataset (default: ../dataset_gestos): ").strip()
         
@@ -56,9 +59,9 @@ class TerminalUI(IUserInterface):
         return gesture_name, dataset_path
     
     def select_existing_gesture(self, gestures_map: Dict[str, int]) -> Tuple[str, str]:
-        print("\n" + " <|" + "-" * 66 + "|>")
+        print("\n" + SEPARADOR)
         print("                 AGREGAR MÁS VIDEOS A GESTO EXISTENTE")
-        print(" <|" + "-" * 66 + "|>")
+        print(SEPARADOR)
         print("\n                          GESTOS DISPONIBLES:\n")
         
         # Mostrar lista numerada de gestos
@@ -66,7 +69,7 @@ class TerminalUI(IUserInterface):
         for idx, gesture in enumerate(gesture_list, 1):
             print(f"    {idx}. {gesture} (ID: {gestures_map[gesture]})")
         
-        print("\n" + " <|" + "-" * 66 + "|>")
+        print("\n" + SEPARADOR)
         
         # Pedir selección
         while True:
@@ -117,21 +120,21 @@ class TerminalUI(IUserInterface):
     
     def show_training_start(self, info: Dict) -> None:
         """Muestra información al iniciar el entrenamiento"""
-        print("\n" + " <|" + "-" * 66 + "|>")
+        print("\n" + SEPARADOR)
         print("                          INICIANDO ENTRENAMIENTO")
-        print(" <|" + "-" * 66 + "|>")
+        print(SEPARADOR)
         print(f"\n  Número de clases: {info['n_classes']}")
         print(f"  Dispositivo: {info['device']}")
-        print("\n" + " <|" + "-" * 66 + "|>" + "\n")
+        print("\n" + SEPARADOR + "\n")
     
     def show_training_complete(self, results: Dict) -> None:
         """Muestra resumen al completar el entrenamiento"""
-        print("\n" + " <|" + "-" * 66 + "|>")
+        print("\n" + SEPARADOR)
         print("                        ENTRENAMIENTO COMPLETADO")
-        print(" <|" + "-" * 66 + "|>")
+        print(SEPARADOR)
         print(f"\n    Mejor Accuracy: {results['best_val_acc']:.2%}")
         print(f"    Modelo guardado exitosamente")
-        print("\n" + " <|" + "-" * 66 + "|>" + "\n")
+        print("\n" + SEPARADOR + "\n")
     
     def show_gestures(self, gestures_map: Dict[str, int]) -> None:
         """Muestra los gestos registrados en formato tabla"""
@@ -139,13 +142,13 @@ class TerminalUI(IUserInterface):
             self.show_message("No hay gestos registrados aún.", "warning")
             return
         
-        print("\n" + " <|" + "-" * 66 + "|>")
+        print("\n" + SEPARADOR)
         print("                          GESTOS REGISTRADOS")
-        print(" <|" + "-" * 66 + "|>" + "\n")
+        print(SEPARADOR + "\n")
         for gesture, label in sorted(gestures_map.items(), key=lambda x: x[1]):
             print(f"    [{label}] {gesture}")
         print(f"\n  Total: {len(gestures_map)} gestos")
-        print("\n" + " <|" + "-" * 66 + "|>" + "\n")
+        print("\n" + SEPARADOR + "\n")
     
     def wait_for_input(self) -> None:
         """Espera input del usuario antes de continuar"""
@@ -3,13 +3,649 @@ Módulo de Preparación de Datos para Entrenamiento
 Procesa videos de gestos y extrae secuencias de landmarks estandarizadas
 """
 
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
+import hashlib
+import multiprocessing
+import os
+import queue
+import threading
 import cv2
 import mediapipe as mp
 import numpy as np
 import json
+from types import SimpleNamespace
 from tqdm import tqdm
 
+# Numba es opcional: sin él, assign_hands se ejecuta como Python normal
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+# decord es opcional: decodifica solo los frames pedidos y los entrega ya en RGB
+try:
+    import decord
+except ImportError:
+    decord = None
+
+
+# Frames decodificados que pueden esperar en cola antes de que MediaPipe los consuma
+FRAME_QUEUE_SIZE = 8
+
+
+def _read_frames(cap, keep, frame_queue, stop):
+    """
+    Hilo lector: decodifica y convierte a RGB mientras MediaPipe procesa el frame anterior
+
+    Args:
+        cap (cv2.VideoCapture): Video abierto
+        keep (set): Índices de frames a procesar (None = todos)
+        frame_queue (queue.Queue): Cola de salida de (índice, frame RGB); None marca el fin del video
+        stop (threading.Event): El consumidor abortó; dejar de decodificar
+    """
+    last_kept = max(keep) if keep else None
+    frame_idx = -1
+
+    # Buffers reutilizados en lugar de reservar un frame nuevo por cvtColor/retrieve.
+    # Los RGB forman un anillo: hasta FRAME_QUEUE_SIZE esperan en la cola y uno está
+    # en MediaPipe, así que el buffer que se sobrescribe ya fue consumido
+    bgr_buf = None
+    rgb_ring = None
+    n_sent = 0
+    try:
+        while not stop.is_set():
+            if not cap.grab():
+                break
+            frame_idx += 1
+
+            if keep is not None:
+                if frame_idx > last_kept:
+                    break
+                if frame_idx not in keep:
+                    continue
+
+            ret, bgr_buf = cap.retrieve(bgr_buf)
+            if not ret:
+                break
+
+            if rgb_ring is None or rgb_ring[0].shape != bgr_buf.shape:
+                rgb_ring = [np.empty_like(bgr_buf) for _ in range(FRAME_QUEUE_SIZE + 2)]
+
+            # Convertir a RGB para MediaPipe, directo sobre el siguiente buffer del anillo
+            frame_rgb = rgb_ring[n_sent % len(rgb_ring)]
+            cv2.cvtColor(bgr_buf, cv2.COLOR_BGR2RGB, dst=frame_rgb)
+            frame_queue.put((frame_idx, frame_rgb))
+            n_sent += 1
+    finally:
+        frame_queue.put(None)
+
+
+# None = NVDEC aún no probado en este proceso; False = no disponible
+_DECORD_GPU_OK = None
+
+
+def _open_decord(video_path, use_nvdec=False):
+    """
+    Abre un video con decord, en CPU o con decodificación por hardware (NVDEC)
+
+    NVDEC es opt-in (DataPreparator(use_nvdec=True)) y solo se usa en el proceso
+    principal: cada proceso que lo usa crea su propio contexto CUDA (cientos de MB
+    de VRAM) y sus sesiones NVDEC, que en GPUs de consumo están limitadas.
+    decord.gpu() requiere una build de decord con CUDA; si falla se usa la CPU y
+    ese resultado se recuerda para los siguientes videos del proceso.
+
+    Returns:
+        decord.VideoReader: Video abierto
+    """
+    global _DECORD_GPU_OK
+    if use_nvdec and _DECORD_GPU_OK is not False:
+        try:
+            video_reader = decord.VideoReader(str(video_path), ctx=decord.gpu(0))
+            _DECORD_GPU_OK = True
+            return video_reader
+        except Exception:
+            _DECORD_GPU_OK = False
+    return decord.VideoReader(str(video_path), ctx=decord.cpu(0))
+
+
+def _read_frames_decord(video_reader, keep, frame_queue, stop):
+    """
+    Hilo lector con decord: decodifica por lotes solo los frames a procesar
+
+    decord devuelve RGB directamente (sin cvtColor) y salta con seek a los índices
+    pedidos, en lugar de avanzar frame a frame con grab(). asnumpy() deja los frames
+    en memoria de CPU, que es lo que necesita MediaPipe, aunque se decodifiquen en GPU.
+
+    Args:
+        video_reader (decord.VideoReader): Video abierto
+        keep (set): Índices de frames a procesar (None = todos)
+        frame_queue (queue.Queue): Cola de salida de (índice, frame RGB); None marca el fin del video
+        stop (threading.Event): El consumidor abortó; dejar de decodificar
+    """
+    indices = sorted(keep) if keep is not None else list(range(len(video_reader)))
+    try:
+        for start in range(0, len(indices), FRAME_QUEUE_SIZE):
+            if stop.is_set():
+                break
+            batch = video_reader.get_batch(indices[start:start + FRAME_QUEUE_SIZE]).asnumpy()
+            for frame_idx, frame_rgb in zip(indices[start:start + FRAME_QUEUE_SIZE], batch):
+                frame_queue.put((frame_idx, frame_rgb))
+    finally:
+        frame_queue.put(None)
+
+
+def landmarks_to_array(hand_landmarks):
+    """
+    Convierte los 21 landmarks de una mano en un vector plano de 63 floats
+
+    Args:
+        hand_landmarks: NormalizedLandmarkList de MediaPipe
+
+    Returns:
+        np.array: Vector [x0, y0, z0, x1, ...] con forma (63,)
+    """
+    # fromiter llena directamente el buffer float32 sin listas anidadas intermedias
+    return np.fromiter(
+        (c for lm in hand_landmarks.landmark for c in (lm.x, lm.y, lm.z)),
+        dtype=np.float32,
+        count=63
+    )
+
+
+# Códigos de lateralidad de MediaPipe para el kernel de asignación
+HAND_UNKNOWN = -1
+HAND_LEFT = 0
+HAND_RIGHT = 1
+
+
+def handedness_code(handedness):
+    """Convierte la clasificación de MediaPipe ('Left'/'Right') en HAND_LEFT/HAND_RIGHT"""
+    label = handedness.classification[0].label[:1].upper()
+    if label == 'L':
+        return HAND_LEFT
+    if label == 'R':
+        return HAND_RIGHT
+    return HAND_UNKNOWN
+
+
+def _sides_from_handedness(results, n_hands, sides):
+    """Lateralidad de cada mano según la clasificación de MediaPipe"""
+    sides[:n_hands] = HAND_UNKNOWN
+    for idx, handedness in zip(range(n_hands), results.multi_handedness or ()):
+        sides[idx] = handedness_code(handedness)
+
+
+def _sides_unknown(results, n_hands, sides):
+    """Backend sin handedness: assign_hands decide por la posición x de la muñeca"""
+    sides[:n_hands] = HAND_UNKNOWN
+
+
+@njit(cache=True)
+def assign_hands(points, sides, n_hands, out):
+    """
+    Escribe las manos detectadas en la fila de 126 features [left(63), right(63)]
+
+    Args:
+        points (np.array): Landmarks de cada mano con forma (2, 63)
+        sides (np.array): Lateralidad de cada mano (HAND_LEFT/HAND_RIGHT/HAND_UNKNOWN)
+        n_hands (int): Número de manos válidas en points
+        out (np.array): Fila de salida con forma (126,); las manos ausentes quedan en cero
+    """
+    out[:] = 0.0
+    for i in range(n_hands):
+        side = sides[i]
+        if side == HAND_UNKNOWN:
+            # Sin handedness: la mano con menor x (wrist) es la izquierda en la imagen
+            side = HAND_LEFT if points[i, 0] < 0.5 else HAND_RIGHT
+        if side == HAND_LEFT:
+            out[:63] = points[i]
+        else:
+            out[63:] = points[i]
+
+
+def _open_video(video_path, use_nvdec=False):
+    """
+    Abre el video con decord si está instalado; si no, con OpenCV (ver _open_decord)
+
+    Returns:
+        tuple: (cv2.VideoCapture o None, decord.VideoReader o None, número de frames)
+    """
+    if decord is not None:
+        video_reader = _open_decord(video_path, use_nvdec)
+        return None, video_reader, len(video_reader)
+    cap = cv2.VideoCapture(str(video_path))
+    return cap, None, int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+
+def _extract_landmarks_pass(cap, video_reader, n_total, hands, keep, seq_length=None):
+    """
+    Pasa por MediaPipe los frames indicados de un video ya abierto (y lo libera)
+
+    Args:
+        cap (cv2.VideoCapture): Video abierto con OpenCV (o None)
+        video_reader (decord.VideoReader): Video abierto con decord (o None)
+        n_total (int): Frames reportados por el contenedor
+        hands: Instancia de MediaPipe Hands a utilizar
+        keep (set): Índices de frames a procesar (None = todos)
+        seq_length (int): Longitud objetivo, solo para dimensionar el buffer
+
+    Returns:
+        tuple: (buffer (capacidad, 126), índices de frame (n,), n) con las n primeras
+            filas del buffer escritas, una por frame con manos
+    """
+    # Buffer contiguo para toda la secuencia; cada frame con manos escribe su fila in-place.
+    # Si el contenedor no reporta el número de frames, el buffer crece por duplicación.
+    capacity = len(keep) if keep is not None else max(n_total, seq_length or 0, 1)
+    sequence = np.empty((max(capacity, 1), 126), dtype=np.float32)
+    frame_ids = np.empty(len(sequence), dtype=np.int64)
+    n_written = 0
+
+    # Buffers reutilizados por frame para las (hasta) 2 manos detectadas
+    hand_points = np.empty((2, 63), dtype=np.float32)
+    hand_sides = np.empty(2, dtype=np.int64)
+
+    # La decodificación corre en un hilo aparte; MediaPipe se queda en este hilo
+    # porque su grafo tiene estado y no es thread-safe
+    frame_queue = queue.Queue(maxsize=FRAME_QUEUE_SIZE)
+    stop = threading.Event()
+    if video_reader is not None:
+        reader = threading.Thread(target=_read_frames_decord, args=(video_reader, keep, frame_queue, stop), daemon=True)
+    else:
+        reader = threading.Thread(target=_read_frames, args=(cap, keep, frame_queue, stop), daemon=True)
+    reader.start()
+
+    # Estrategia de lateralidad elegida una vez por video, con la primera detección
+    fill_sides = None
+
+    try:
+        while True:
+            item = frame_queue.get()
+            if item is None:
+                break
+            frame_idx, frame_rgb = item
+
+            results = hands.process(frame_rgb)
+
+            # Extraer landmarks SIEMPRE como vector combinado de 2 manos (left, right)
+            # Por cada frame construiremos un vector de 126 features: [handA(63), handB(63)]
+            # Si falta alguna mano se rellenará con ceros para mantener consistencia.
+            if results.multi_hand_landmarks:
+                if n_written == len(sequence):
+                    sequence = np.concatenate([sequence, np.empty_like(sequence)])
+                    frame_ids = np.concatenate([frame_ids, np.empty_like(frame_ids)])
+
+                # Si MediaPipe devuelve información de handedness, la usamos para asignar
+                if fill_sides is None:
+                    has_handedness = bool(getattr(results, 'multi_handedness', None))
+                    fill_sides = _sides_from_handedness if has_handedness else _sides_unknown
+
+                n_hands = min(len(results.multi_hand_landmarks), 2)
+                for idx in range(n_hands):
+                    hand_points[idx] = landmarks_to_array(results.multi_hand_landmarks[idx])
+                fill_sides(results, n_hands, hand_sides)
+
+                # left + right (orden fijo) -> 126 features escritas directamente en el buffer
+                assign_hands(hand_points, hand_sides, n_hands, sequence[n_written])
+                frame_ids[n_written] = frame_idx
+                n_written += 1
+    finally:
+        # Si MediaPipe lanza una excepción, el lector puede estar bloqueado en put()
+        # con la cola llena: se le pide parar y se vacía la cola hasta que termine
+        stop.set()
+        while reader.is_alive():
+            try:
+                frame_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        reader.join()
+        if cap is not None:
+            cap.release()
+
+    return sequence, frame_ids[:n_written], n_written
+
+
+def extract_landmarks_from_video(video_path, hands, seq_length=None, reset_tracking=True, use_nvdec=False):
+    """
+    Extrae landmarks de un video frame por frame
+
+    Con seq_length, en videos más largos primero solo se procesan los frames que
+    sobreviven al submuestreo uniforme del clip completo. Si en alguno de ellos no
+    se detectan manos, se procesa también el resto del clip y se submuestrea entre
+    los frames con manos, igual que si se hubiera procesado el video entero; así
+    los frames sin manos no se sustituyen repitiendo el último frame detectado.
+
+    Args:
+        video_path (Path): Ruta al video
+        hands: Instancia de MediaPipe Hands a utilizar
+        seq_length (int): Si se indica, la secuencia se devuelve ya estandarizada
+        reset_tracking (bool): Reiniciar el tracking de MediaPipe antes del video
+        use_nvdec (bool): Decodificar con NVDEC si decord lo soporta (solo en el proceso principal)
+
+    Returns:
+        np.array: Array de landmarks con forma (n_frames, 126), o (seq_length, 126)
+            si se indicó seq_length; None si no se detectaron manos
+    """
+    # Con static_image_mode=False MediaPipe solo ejecuta la detección de palma
+    # cuando pierde la mano y, mientras tanto, rastrea la ROI del frame anterior.
+    # La instancia se reutiliza entre videos (get_hands), así que sin reset el
+    # primer frame de un clip partiría de la ROI del último frame del clip previo.
+    # reset() reinicia solo el grafo, sin reconstruir la instancia.
+    if reset_tracking and hasattr(hands, 'reset'):
+        hands.reset()
+
+    cap, video_reader, n_total = _open_video(video_path, use_nvdec)
+
+    # Elegir de antemano los frames que se conservarían al truncar la secuencia,
+    # así el resto no se decodifica completo ni pasa por MediaPipe
+    keep = None
+    if seq_length and n_total > seq_length:
+        keep = set(truncation_indices(n_total, seq_length).tolist())
+
+    sequence, frame_ids, n_written = _extract_landmarks_pass(
+        cap, video_reader, n_total, hands, keep, seq_length
+    )
+
+    if keep is not None and n_written < seq_length:
+        # Algún frame submuestreado no tenía manos: procesar el resto del clip
+        # (en una segunda lectura, con el tracking reiniciado porque se vuelve atrás)
+        if reset_tracking and hasattr(hands, 'reset'):
+            hands.reset()
+        cap, video_reader, _ = _open_video(video_path, use_nvdec)
+        rest, rest_ids, n_rest = _extract_landmarks_pass(
+            cap, video_reader, n_total, hands, set(range(n_total)) - keep, seq_length
+        )
+
+        # Unir ambas pasadas en orden de frame
+        order = np.argsort(np.concatenate([frame_ids, rest_ids]), kind='stable')
+        sequence = np.concatenate([sequence[:n_written], rest[:n_rest]])[order]
+        n_written = len(sequence)
+
+    if n_written == 0:
+        return None
+
+    if seq_length and n_written <= seq_length:
+        if len(sequence) < seq_length:
+            sequence = np.concatenate([sequence, np.empty((seq_length - len(sequence), 126), dtype=np.float32)])
+        # El buffer ya tiene al menos seq_length filas: rellenar repitiendo el último frame in-place
+        sequence[n_written:seq_length] = sequence[n_written - 1]
+        return sequence[:seq_length]
+
+    if seq_length:
+        return standardize_sequence(sequence[:n_written], seq_length)
+
+    return sequence[:n_written]
+
+
+@lru_cache(maxsize=None)
+def truncation_indices(n_frames, seq_length):
+    """
+    Índices de los seq_length frames uniformemente distribuidos entre n_frames
+
+    Los videos del dataset tienen pocas longitudes distintas, así que el array se
+    calcula una vez por (n_frames, seq_length). Es de solo lectura porque se comparte.
+    """
+    indices = np.linspace(0, n_frames - 1, seq_length, dtype=int)
+    indices.setflags(write=False)
+    return indices
+
+
+def standardize_sequence(sequence, seq_length, out=None):
+    """
+    Estandariza la longitud de la secuencia mediante padding o truncamiento
+
+    Args:
+        sequence (np.array): Secuencia original con forma (n_frames, 126)
+        seq_length (int): Longitud fija de secuencias (frames)
+        out (np.array): Buffer de salida opcional con forma (seq_length, 126), p.ej. una
+            fila de X_data preasignado; evita reservar un array nuevo por video
+
+    Returns:
+        np.array: Secuencia estandarizada float32 con forma (seq_length, 126) (out si se indicó)
+    """
+    # float32 en todo el pipeline: sin copia si ya lo es; también evita que np.take
+    # reciba un out de distinto dtype si la secuencia viene de otra fuente (p.ej. float16)
+    sequence = np.asarray(sequence, dtype=np.float32)
+    n_frames = sequence.shape[0]
+
+    if n_frames == seq_length:
+        # Ya tiene la longitud correcta
+        if out is None:
+            return sequence
+        out[:] = sequence
+        return out
+
+    if out is None:
+        out = np.empty((seq_length,) + sequence.shape[1:], dtype=np.float32)
+
+    if n_frames > seq_length:
+        # Truncar: tomar frames uniformemente distribuidos, escribiendo directo en out
+        return np.take(sequence, truncation_indices(n_frames, seq_length), axis=0, out=out)
+
+    # Padding: repetir el último frame
+    out[:n_frames] = sequence
+    out[n_frames:] = sequence[-1]
+    return out
+
+
+# Instancia de MediaPipe Hands por proceso: se crea en el primer uso y se reutiliza
+# entre todos los videos que procese ese proceso (la carga del modelo TFLite es costosa)
+_HANDS = None
+_HANDS_CONFIG = None
+
+
+class TasksHandLandmarker:
+    """
+    Adaptador del HandLandmarker de MediaPipe Tasks con la interfaz de mp.solutions.hands
+
+    La API Tasks permite ejecutar el modelo de landmarks con el delegate de GPU.
+    process() devuelve un objeto con multi_hand_landmarks / multi_handedness
+    equivalente al de Hands.process(), así que extract_landmarks_from_video
+    no necesita distinguir entre ambos backends.
+    """
+    
+    # Paso de timestamp entre frames; el modo VIDEO solo exige que sea creciente
+    FRAME_INTERVAL_MS = 33
+    
+    # Salto de timestamp entre videos (ver reset)
+    RESET_GAP_MS = 1000
+    
+    def __init__(self, model_path, min_detection_confidence=0.5, use_gpu=True):
+        """
+        Args:
+            model_path (str/Path): Ruta al bundle hand_landmarker.task
+            min_detection_confidence (float): Confianza mínima de detección de la mano
+            use_gpu (bool): Intentar el delegate de GPU antes de caer a CPU
+        """
+        from mediapipe.tasks.python import BaseOptions
+        from mediapipe.tasks.python import vision
+        
+        delegates = [BaseOptions.Delegate.GPU, BaseOptions.Delegate.CPU] if use_gpu else [BaseOptions.Delegate.CPU]
+        last_error = None
+        for delegate in delegates:
+            try:
+                options = vision.HandLandmarkerOptions(
+                    base_options=BaseOptions(model_asset_path=str(model_path), delegate=delegate),
+                    running_mode=vision.RunningMode.VIDEO,
+                    num_hands=2,
+                    min_hand_detection_confidence=min_detection_confidence
+                )
+                self.landmarker = vision.HandLandmarker.create_from_options(options)
+                self.delegate = delegate
+                break
+            except Exception as e:
+                # El delegate de GPU no está disponible en todas las plataformas
+                last_error = e
+        else:
+            raise RuntimeError(f"No se pudo crear HandLandmarker: {last_error}")
+        
+        # Un mismo landmarker se reutiliza entre videos: el timestamp nunca retrocede
+        self.timestamp_ms = 0
+    
+    def process(self, frame_rgb):
+        """Procesa un frame RGB y devuelve un resultado con la forma de mp.solutions.hands"""
+        self.timestamp_ms += self.FRAME_INTERVAL_MS
+        image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame_rgb)
+        result = self.landmarker.detect_for_video(image, self.timestamp_ms)
+        
+        if not result.hand_landmarks:
+            return SimpleNamespace(multi_hand_landmarks=None, multi_handedness=None)
+        
+        return SimpleNamespace(
+            multi_hand_landmarks=[SimpleNamespace(landmark=hand) for hand in result.hand_landmarks],
+            multi_handedness=[
+                SimpleNamespace(classification=[SimpleNamespace(label=categories[0].category_name)])
+                for categories in result.handedness
+            ]
+        )
+    
+    def reset(self):
+        """
+        Marca el inicio de un video nuevo sin reconstruir el landmarker
+        
+        Recrear el HandLandmarker (y su delegate de GPU) en cada video anularía la
+        reutilización de la instancia de get_hands(). En modo VIDEO basta con un salto
+        de timestamp: la ROI heredada del clip anterior no supera
+        min_tracking_confidence en el primer frame y MediaPipe vuelve a ejecutar la
+        detección de palma por su cuenta.
+        """
+        self.timestamp_ms += self.RESET_GAP_MS
+    
+    def close(self):
+        self.landmarker.close()
+
+
+def get_hands(min_detection_confidence, model_complexity=0, landmarker_model=None):
+    """
+    Devuelve la instancia de MediaPipe Hands del proceso actual
+
+    Args:
+        min_detection_confidence (float): Confianza mínima de MediaPipe
+        model_complexity (int): 0 = modelo lite de landmarks, 1 = modelo completo
+        landmarker_model (str/Path): Bundle hand_landmarker.task; si se indica se usa
+            la API Tasks con delegate de GPU (y CPU como respaldo)
+
+    Returns:
+        Instancia reutilizable con método process() (se recrea si cambia la configuración)
+    """
+    global _HANDS, _HANDS_CONFIG
+    config = (min_detection_confidence, model_complexity, landmarker_model)
+    if _HANDS is None or _HANDS_CONFIG != config:
+        if _HANDS is not None:
+            _HANDS.close()
+        
+        if landmarker_model:
+            _HANDS = TasksHandLandmarker(landmarker_model, min_detection_confidence)
+        else:
+            # static_image_mode=False: MediaPipe rastrea la mano entre frames en lugar de
+            # ejecutar la detección de palma en cada uno. Hasta 2 manos (queremos usar SIEMPRE 2 manos)
+            _HANDS = mp.solutions.hands.Hands(
+                static_image_mode=False,
+                max_num_hands=2,
+                min_detection_confidence=min_detection_confidence,
+                model_complexity=model_complexity
+            )
+        _HANDS_CONFIG = config
+    return _HANDS
+
+
+# Versión del algoritmo de extracción; subirla invalida los cachés generados antes
+LANDMARKS_CACHE_VERSION = 2
+
+
+def landmarks_cache_path(video_path, seq_length, hands_config):
+    """
+    Ruta del caché de landmarks de un video (junto al .mp4)
+
+    El nombre incluye un hash de seq_length, de la configuración de MediaPipe y de
+    LANDMARKS_CACHE_VERSION: cambiar cualquiera de ellos invalida el caché en lugar
+    de reutilizar secuencias extraídas con otros parámetros.
+    """
+    video_path = Path(video_path)
+    digest = hashlib.md5(repr((LANDMARKS_CACHE_VERSION, seq_length) + tuple(hands_config)).encode()).hexdigest()[:8]
+    return video_path.with_name(f"{video_path.stem}.landmarks.{digest}.npy")
+
+
+def extract_landmarks_cached(video_path, seq_length, hands_config, use_cache=True, use_nvdec=False):
+    """
+    Igual que extract_landmarks_from_video, pero reutiliza el .npy cacheado si es
+    más reciente que el video. En un acierto no se decodifica el video ni se carga
+    MediaPipe.
+
+    Args:
+        video_path (Path): Ruta al video
+        seq_length (int): Longitud fija de secuencias (frames)
+        hands_config (tuple): Argumentos de get_hands()
+        use_cache (bool): Leer/escribir el caché de landmarks
+        use_nvdec (bool): Decodificar con NVDEC (ver _open_decord)
+
+    Returns:
+        np.array: Secuencia estandarizada con forma (seq_length, 126) o None si falla
+    """
+    video_path = Path(video_path)
+    cache_path = landmarks_cache_path(video_path, seq_length, hands_config)
+    
+    if use_cache and cache_path.exists() and cache_path.stat().st_mtime > video_path.stat().st_mtime:
+        return np.load(cache_path).astype(np.float32)
+    
+    sequence = extract_landmarks_from_video(
+        video_path, get_hands(*hands_config), seq_length, use_nvdec=use_nvdec
+    )
+    
+    if use_cache and sequence is not None:
+        np.save(cache_path, sequence.astype(np.float16))
+    
+    return sequence
+
+
+# Variables que limitan los pools de hilos de OpenMP/BLAS a uno por proceso
+WORKER_THREAD_ENV = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+
+@contextmanager
+def _single_threaded_workers():
+    """
+    Exporta *_NUM_THREADS=1 mientras se lanzan los workers del pool
+
+    Con 'spawn' cada worker hereda el entorno al arrancar, antes de importar
+    numpy/cv2, que es cuando esas librerías dimensionan sus pools de hilos.
+    El entorno del proceso padre se restaura al salir.
+    """
+    previous = {name: os.environ.get(name) for name in WORKER_THREAD_ENV}
+    os.environ.update({name: '1' for name in WORKER_THREAD_ENV})
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _init_worker():
+    """Un hilo de OpenCV por worker: el paralelismo ya lo dan los procesos del pool"""
+    cv2.setNumThreads(1)
+
+
+def _process_video_task(task):
+    """
+    Procesa un video dentro de un worker del pool
+
+    Args:
+        task (tuple): (idx, video_path, seq_length, hands_config, use_cache) donde
+            hands_config son los argumentos de get_hands()
+
+    Returns:
+        tuple: (idx, secuencia estandarizada o None si no hubo landmarks)
+    """
+    idx, video_path, seq_length, hands_config, use_cache = task
+    return idx, extract_landmarks_cached(video_path, seq_length, hands_config, use_cache)
+
 
 class DataPreparator:
     """
@@ -19,30 +655,47 @@ class DataPreparator:
     - Genera mapeo de gestos dinámico
     """
     
-    def __init__(self, dataset_path, seq_length=40, min_detection_confidence=0.5):
+    def __init__(self, dataset_path, seq_length=40, min_detection_confidence=0.5, n_workers=None,
+                 model_complexity=0, landmarker_model=None, use_cache=True, use_nvdec=False):
         """
         Args:
             dataset_path (str/Path): Ruta al directorio con carpetas de gestos
             seq_length (int): Longitud fija de secuencias (frames)
             min_detection_confidence (float): Confianza mínima de MediaPipe
+            n_workers (int): Procesos para extraer landmarks en paralelo (default: núcleos de CPU)
+            model_complexity (int): Modelo de landmarks de MediaPipe. 0 (lite) reduce
+                aproximadamente a la mitad la latencia por frame a cambio de algo de
+                precisión en los landmarks; 1 es el modelo completo
+            landmarker_model (str/Path): Bundle hand_landmarker.task para usar la API
+                Tasks de MediaPipe con delegate de GPU (None = mp.solutions.hands en CPU)
+            use_cache (bool): Reutilizar los landmarks cacheados junto a cada video
+                (<video>.landmarks.<hash>.npy) en lugar de volver a ejecutar MediaPipe
+            use_nvdec (bool): Decodificar con NVDEC (requiere decord con CUDA). Fuerza
+                un único proceso: cada worker del pool abriría su propio contexto CUDA
+                y sus sesiones NVDEC. Los workers del pool siempre decodifican en CPU
         """
         self.dataset_path = Path(dataset_path)
         self.seq_length = seq_length
         self.min_detection_confidence = min_detection_confidence
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.use_nvdec = use_nvdec and decord is not None
+        if use_nvdec and decord is None:
+            print("⚠️  --nvdec requiere decord; se decodifica con OpenCV")
+        if self.use_nvdec and self.n_workers > 1:
+            print(f"ℹ️  NVDEC activo: 1 proceso en lugar de {self.n_workers}")
+            self.n_workers = 1
+        self.model_complexity = model_complexity
+        self.landmarker_model = str(landmarker_model) if landmarker_model else None
+        self.use_cache = use_cache
         
-        # Inicializar MediaPipe Hands
-        self.mp_hands = mp.solutions.hands
-        # Configurar MediaPipe para detectar hasta 2 manos (queremos usar SIEMPRE 2 manos)
-        self.hands = self.mp_hands.Hands(
-            static_image_mode=False,
-            max_num_hands=2,
-            min_detection_confidence=min_detection_confidence
-        )
+        # MediaPipe Hands se obtiene bajo demanda con get_hands(): con el pool de procesos
+        # el proceso padre nunca necesita cargar el modelo
         
         # Almacenar datos procesados
         self.X_data = []  # Secuencias de landmarks
         self.Y_labels = []  # Etiquetas numéricas
         self.gestures_map = {}  # {nombre_gesto: id_numerico}
+        self.gesture_videos = {}  # {nombre_gesto: [rutas .mp4]} (cacheado por scan_dataset)
         
     def scan_dataset(self):
         """
@@ -58,161 +711,144 @@ class DataPreparator:
         if not self.dataset_path.exists():
             raise FileNotFoundError(f"Dataset no encontrado: {self.dataset_path}")
         
-        gesture_folders = [f for f in self.dataset_path.iterdir() if f.is_dir()]
+        # Un único recorrido con os.scandir: las entradas ya traen su tipo,
+        # sin un stat() extra por archivo (relevante en NFS/SMB)
+        with os.scandir(self.dataset_path) as entries:
+            gesture_folders = [entry for entry in entries if entry.is_dir()]
         
         if not gesture_folders:
             raise ValueError(f"No se encontraron carpetas de gestos en {self.dataset_path}")
         
         # Crear mapeo automático (ordenado alfabéticamente para consistencia)
-        gesture_folders.sort()
+        gesture_folders.sort(key=lambda entry: entry.name)
         self.gestures_map = {folder.name: idx for idx, folder in enumerate(gesture_folders)}
         
+        # Cachear los videos de cada gesto para que process_dataset no vuelva a listarlos
+        self.gesture_videos = {}
+        for folder in gesture_folders:
+            with os.scandir(folder.path) as entries:
+                self.gesture_videos[folder.name] = sorted(
+                    Path(entry.path) for entry in entries
+                    if entry.name.endswith('.mp4') and entry.is_file()
+                )
+        
         print(f"\n📁 Gestos encontrados: {len(self.gestures_map)}")
         for gesture, idx in self.gestures_map.items():
-            videos = list((self.dataset_path / gesture).glob("*.mp4"))
-            print(f"  {idx}: {gesture} ({len(videos)} videos)")
+            print(f"  {idx}: {gesture} ({len(self.gesture_videos[gesture])} videos)")
         
         return self.gestures_map
     
+    @property
+    def hands_config(self):
+        """Argumentos de get_hands() para este preparador"""
+        return (self.min_detection_confidence, self.model_complexity, self.landmarker_model)
+    
     def extract_landmarks_from_video(self, video_path):
         """
-        Extrae landmarks de un video frame por frame
-        
+        Extrae landmarks de un video usando la instancia de MediaPipe del preparador
+
         Args:
             video_path (Path): Ruta al video
-            
+
         Returns:
-            np.array: Array de landmarks con forma (n_frames, 63) o None si falla
+            np.array: Secuencia estandarizada con forma (seq_length, 126) o None si falla
         """
-        cap = cv2.VideoCapture(str(video_path))
-        landmarks_sequence = []
-        
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            # Convertir a RGB para MediaPipe
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.hands.process(frame_rgb)
-            
-            # Extraer landmarks SIEMPRE como vector combinado de 2 manos (left, right)
-            # Por cada frame construiremos un vector de 126 features: [handA(63), handB(63)]
-            # Si falta alguna mano se rellenará con ceros para mantener consistencia.
-            if results.multi_hand_landmarks:
-                # Preparar placeholders para left/right según MediaPipe (si está disponible)
-                left_vec = np.zeros(63, dtype=np.float32)
-                right_vec = np.zeros(63, dtype=np.float32)
-
-                # Si MediaPipe devuelve información de handedness, la usamos para asignar
-                handedness = None
-                if hasattr(results, 'multi_handedness') and results.multi_handedness:
-                    handedness = [h.classification[0].label for h in results.multi_handedness]
-
-                # Iterar por las manos detectadas y asignar a left/right
-                for idx, hand_landmarks in enumerate(results.multi_hand_landmarks):
-                    points = np.array([[lm.x, lm.y, lm.z] for lm in hand_landmarks.landmark], dtype=np.float32).flatten()
-
-                    assigned = False
-                    # Intentar asignar por handedness si está disponible
-                    if handedness and idx < len(handedness):
-                        label = handedness[idx].lower()
-                        if 'left' in label:
-                            left_vec = points
-                            assigned = True
-                        elif 'right' in label:
-                            right_vec = points
-                            assigned = True
-
-                    # Si no se asignó por handedness, usar posición horizontal (x del primer landmark)
-                    if not assigned:
-                        try:
-                            wrist_x = points[0]  # x del primer landmark (wrist)
-                            # mano con menor x es la izquierda en la imagen
-                            if wrist_x < 0.5:
-                                left_vec = points
-                            else:
-                                right_vec = points
-                        except Exception:
-                            # Fallback simple: si left está vacío poner ahí
-                            if np.all(left_vec == 0):
-                                left_vec = points
-                            else:
-                                right_vec = points
-
-                # Concatenar left + right (orden fijo) -> 126 features
-                combined = np.concatenate([left_vec, right_vec])
-                landmarks_sequence.append(combined)
-            
-        cap.release()
-        
-        if len(landmarks_sequence) == 0:
-            return None
-        
-        return np.array(landmarks_sequence)
+        return extract_landmarks_cached(
+            video_path, self.seq_length, self.hands_config, self.use_cache, self.use_nvdec
+        )
     
-    def standardize_sequence(self, sequence):
+    def standardize_sequence(self, sequence, out=None):
         """
-        Estandariza la longitud de la secuencia mediante padding o truncamiento
-        
+        Estandariza la longitud de la secuencia a self.seq_length
+
         Args:
-            sequence (np.array): Secuencia original con forma (n_frames, 63)
-            
+            sequence (np.array): Secuencia original con forma (n_frames, 126)
+            out (np.array): Buffer de salida opcional con forma (seq_length, 126)
+
         Returns:
-            np.array: Secuencia estandarizada con forma (seq_length, 63)
+            np.array: Secuencia estandarizada con forma (seq_length, 126)
         """
-        n_frames = sequence.shape[0]
-        
-        if n_frames == self.seq_length:
-            # Ya tiene la longitud correcta
-            return sequence
-        
-        elif n_frames > self.seq_length:
-            # Truncar: tomar frames uniformemente distribuidos
-            indices = np.linspace(0, n_frames - 1, self.seq_length, dtype=int)
-            return sequence[indices]
-        
-        else:
-            # Padding: repetir el último frame
-            padding_needed = self.seq_length - n_frames
-            last_frame = sequence[-1:]
-            padding = np.repeat(last_frame, padding_needed, axis=0)
-            return np.vstack([sequence, padding])
+        return standardize_sequence(sequence, self.seq_length, out)
     
-    def process_dataset(self):
+    def process_dataset(self, progress_callback=None):
         """
         Procesa todos los videos del dataset y genera X_data, Y_labels
+        
+        Args:
+            progress_callback (callable): Opcional, se llama como (procesados, total)
+                cada vez que termina un video, para mostrar progreso fuera de la terminal
         """
         print(f"\n🔄 Procesando dataset...")
         
         # Escanear gestos
         self.scan_dataset()
         
-        # Procesar cada gesto
-        for gesture_name, label in self.gestures_map.items():
-            gesture_folder = self.dataset_path / gesture_name
-            video_files = list(gesture_folder.glob("*.mp4"))
-            
-            print(f"\n📹 Procesando '{gesture_name}' ({len(video_files)} videos)...")
-            
-            for video_path in tqdm(video_files, desc=f"  {gesture_name}"):
-                # Extraer landmarks
-                sequence = self.extract_landmarks_from_video(video_path)
-                
-                if sequence is None:
-                    print(f"  ⚠️  Sin landmarks detectados: {video_path.name}")
-                    continue
-                
-                # Estandarizar longitud
-                standardized_seq = self.standardize_sequence(sequence)
-                
-                # Guardar
-                self.X_data.append(standardized_seq)
-                self.Y_labels.append(label)
+        # Lista plana de (video, etiqueta) de todos los gestos
+        tasks = [
+            (video_path, label)
+            for gesture_name, label in self.gestures_map.items()
+            for video_path in self.gesture_videos[gesture_name]
+        ]
+        
+        # El total de videos ya se conoce: reservar X_data una sola vez y escribir
+        # cada secuencia en su fila; los videos sin manos se descartan al final
+        self.X_data = np.empty((len(tasks), self.seq_length, 126), dtype=np.float32)
+        self.Y_labels = np.array([label for _, label in tasks], dtype=np.int64)
+        kept = np.zeros(len(tasks), dtype=bool)
+        done = 0
         
-        # Convertir a numpy arrays
-        self.X_data = np.array(self.X_data)
-        self.Y_labels = np.array(self.Y_labels)
+        def store(idx, sequence):
+            nonlocal done
+            if sequence is not None:
+                self.standardize_sequence(sequence, out=self.X_data[idx])
+                kept[idx] = True
+            done += 1
+            if progress_callback is not None:
+                progress_callback(done, len(tasks))
+        
+        print(f"\n📹 Procesando {len(tasks)} videos con {self.n_workers} proceso(s)...")
+        
+        if self.n_workers > 1 and len(tasks) > 1:
+            # Cada worker decodifica y ejecuta MediaPipe en su propio núcleo.
+            # 'spawn' evita heredar por fork el grafo de MediaPipe del proceso padre.
+            jobs = [
+                (idx, video_path, self.seq_length, self.hands_config, self.use_cache)
+                for idx, (video_path, _) in enumerate(tasks)
+            ]
+            # Videos más pesados primero: los cortos rellenan los huecos al final y
+            # ningún worker queda procesando un video largo mientras el resto espera
+            jobs.sort(key=lambda job: job[1].stat().st_size, reverse=True)
+            # Chunks pequeños para que el reparto se equilibre, sin caer en un IPC por video
+            # cuando el dataset es grande
+            chunksize = max(1, min(4, len(jobs) // (self.n_workers * 4)))
+            ctx = multiprocessing.get_context('spawn')
+            # N procesos x M hilos de OpenCV/OpenMP compitiendo por N núcleos
+            # solo añade cambios de contexto: un hilo por worker
+            with _single_threaded_workers():
+                pool = ctx.Pool(self.n_workers, initializer=_init_worker)
+            with pool:
+                results = pool.imap_unordered(_process_video_task, jobs, chunksize=chunksize)
+                # Cada resultado va a la fila de su tarea: el orden final no depende
+                # del orden de llegada
+                for idx, sequence in tqdm(results, total=len(jobs), desc="  videos"):
+                    store(idx, sequence)
+        else:
+            for idx, (video_path, _) in enumerate(tqdm(tasks, desc="  videos")):
+                store(idx, self.extract_landmarks_from_video(video_path))
+        
+        if not kept.all():
+            for (video_path, _), ok in zip(tasks, kept):
+                if not ok:
+                    print(f"  ⚠️  Sin landmarks detectados: {video_path.name}")
+            # Compactar in-place (las filas solo se mueven hacia adelante) y quedarse
+            # con una vista, en lugar de copiar todo X_data con indexado booleano
+            kept_rows = np.flatnonzero(kept)
+            for dst, src in enumerate(kept_rows):
+                if dst != src:
+                    self.X_data[dst] = self.X_data[src]
+                    self.Y_labels[dst] = self.Y_labels[src]
+            self.X_data = self.X_data[:len(kept_rows)]
+            self.Y_labels = self.Y_labels[:len(kept_rows)]
         
         print(f"\n✅ Procesamiento completo!")
         print(f"  📊 Shape de X: {self.X_data.shape}")
@@ -225,18 +861,27 @@ class DataPreparator:
         
         return self.X_data, self.Y_labels
     
-    def save_data(self, output_dir):
+    def save_data(self, output_dir, dtype=np.float16):
         """
         Guarda los datos procesados y el mapeo de gestos
         
         Args:
             output_dir (str/Path): Directorio de salida
+            dtype: Tipo de X_data en disco. float16 basta para coordenadas
+                normalizadas de MediaPipe y reduce el archivo a la mitad;
+                el entrenamiento vuelve a float32 al cargar.
         """
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Guardar datos
-        np.save(output_dir / "X_data.npy", self.X_data)
+        # Guardar datos: X_data se escribe sobre un .npy mapeado en memoria, así la
+        # conversión a dtype va directo al archivo sin una copia completa en RAM
+        x_file = np.lib.format.open_memmap(
+            output_dir / "X_data.npy", mode='w+', dtype=dtype, shape=self.X_data.shape
+        )
+        x_file[...] = self.X_data
+        x_file.flush()
+        del x_file
         np.save(output_dir / "Y_labels.npy", self.Y_labels)
         
         # Guardar mapeo de gestos
@@ -247,14 +892,10 @@ class DataPreparator:
         print(f"  ✓ X_data.npy")
         print(f"  ✓ Y_labels.npy")
         print(f"  ✓ gestures_map.json")
-    
-    def __del__(self):
-        """Liberar recursos de MediaPipe al finalizar"""
-        if hasattr(self, 'hands'):
-            self.hands.close()
 
 
-def load_and_process_data(dataset_path, output_dir, seq_length=40):
+def load_and_process_data(dataset_path, output_dir, seq_length=40, n_workers=None, model_complexity=0,
+                          landmarker_model=None, use_cache=True, progress_callback=None, use_nvdec=False):
     """
     Función conveniente para cargar y procesar datos
     
@@ -262,12 +903,26 @@ def load_and_process_data(dataset_path, output_dir, seq_length=40):
         dataset_path (str): Ruta al dataset
         output_dir (str): Ruta de salida
         seq_length (int): Longitud de secuencias
+        n_workers (int): Procesos para la extracción de landmarks
+        model_complexity (int): Modelo de landmarks de MediaPipe (0 = lite, 1 = completo)
+        landmarker_model (str): Bundle hand_landmarker.task para la API Tasks (GPU)
+        use_cache (bool): Reutilizar landmarks ya extraídos de cada video
+        progress_callback (callable): Opcional, recibe (procesados, total) por cada video
+        use_nvdec (bool): Decodificar con NVDEC en un único proceso (ver DataPreparator)
         
     Returns:
         tuple: (X_data, Y_labels, gestures_map)
     """
-    preparator = DataPreparator(dataset_path, seq_length=seq_length)
-    X_data, Y_labels = preparator.process_dataset()
+    preparator = DataPreparator(
+        dataset_path,
+        seq_length=seq_length,
+        n_workers=n_workers,
+        model_complexity=model_complexity,
+        landmarker_model=landmarker_model,
+        use_cache=use_cache,
+        use_nvdec=use_nvdec
+    )
+    X_data, Y_labels = preparator.process_dataset(progress_callback)
     preparator.save_data(output_dir)
     
     return X_data, Y_labels, preparator.gestures_map
@@ -284,9 +939,23 @@ if __name__ == "__main__":
                       help='Directorio de salida (default: directorio actual)')
     parser.add_argument('--seq-length', type=int, default=40,
                       help='Longitud de secuencias (default: 40)')
+    parser.add_argument('--workers', type=int, default=None,
+                      help='Procesos para extraer landmarks (default: núcleos de CPU)')
+    parser.add_argument('--model-complexity', type=int, choices=(0, 1), default=0,
+                      help='Modelo de MediaPipe: 0 = lite (rápido), 1 = completo (default: 0)')
+    parser.add_argument('--landmarker-model', type=str, default=None,
+                      help='Ruta a hand_landmarker.task para usar MediaPipe Tasks con GPU')
+    parser.add_argument('--no-cache', action='store_true',
+                      help='Ignorar el caché de landmarks y volver a procesar todos los videos')
+    parser.add_argument('--nvdec', action='store_true',
+                      help='Decodificar con NVDEC (decord con CUDA) en un único proceso')
     
     args = parser.parse_args()
     
     print("🚀 Iniciando preparación de datos...")
-    load_and_process_data(args.dataset, args.output, args.seq_length)
+    load_and_process_data(
+        args.dataset, args.output, args.seq_length, args.workers,
+        args.model_complexity, args.landmarker_model, not args.no_cache,
+        use_nvdec=args.nvdec
+    )
     print("\n✅ Proceso completado!")
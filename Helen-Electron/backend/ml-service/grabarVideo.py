@@ -1,6 +1,8 @@
 from pathlib import Path
 import cv2
 import os
+import queue
+import threading
 import time
 import sys
 
@@ -18,18 +20,56 @@ ruta_gesto = ruta_base / gesto
 # Crear carpeta si no existe
 ruta_gesto.mkdir(parents=True, exist_ok=True)
 
-# Configurar cámara
-cap = cv2.VideoCapture(0)
+# Frames que pueden esperar al codificador sin frenar la captura (~3 s a 20 fps)
+TAMANO_COLA_ESCRITURA = 64
+
+
+def escribir_frames(cola, out):
+    """Hilo codificador: escribe en el VideoWriter los frames de la cola hasta recibir None"""
+    while True:
+        frame = cola.get()
+        if frame is None:
+            break
+        out.write(frame)
+
+
+# Configurar cámara: backend nativo de menor latencia (DirectShow / V4L2) si está disponible
+if sys.platform == 'win32':
+    backend = cv2.CAP_DSHOW
+elif sys.platform.startswith('linux'):
+    backend = cv2.CAP_V4L2
+else:
+    backend = cv2.CAP_ANY
+cap = cv2.VideoCapture(0, backend)
+if not cap.isOpened():
+    cap = cv2.VideoCapture(0)
 fps = 20.0
 duracion = 3  # segundos
-ancho, alto = int(cap.get(3)), int(cap.get(4))
+
+# MediaPipe reescala internamente cada frame, así que grabar a resolución nativa
+# (p.ej. 1080p) solo agranda los clips y encarece su decodificación en data_prep.py
+ANCHO_CAPTURA, ALTO_CAPTURA = 640, 360
+# MJPG antes que la resolución: en cámaras UVC el formato YUV suele limitarse
+# a 5-15 fps, mientras que MJPG sostiene 30+ fps a la misma resolución
+cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc('M', 'J', 'P', 'G'))
+cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Entregar siempre el frame más reciente
+cap.set(cv2.CAP_PROP_FRAME_WIDTH, ANCHO_CAPTURA)
+cap.set(cv2.CAP_PROP_FRAME_HEIGHT, ALTO_CAPTURA)
+
+# La cámara puede no soportar la resolución pedida: usar la que realmente entrega
+ancho, alto = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+fourcc_real = int(cap.get(cv2.CAP_PROP_FOURCC))
+fourcc_real = "".join(chr((fourcc_real >> 8 * i) & 0xFF) for i in range(4))
+if fourcc_real != 'MJPG':
+    print(f"⚠️  La cámara no aceptó MJPG (formato actual: {fourcc_real!r}); la captura puede ser más lenta")
 
 print(f"\n🎥 Grabando videos del gesto '{gesto.upper()}'")
 print(f"📁 Guardando en: {ruta_gesto}")
 print("Presiona 's' para grabar un nuevo clip (3 segundos).")
 print("Presiona 'q' para salir.\n")
 
-contador = len(list(ruta_gesto.iterdir())) + 1  # continua numerando
+contador = len(list(ruta_gesto.glob("*.mp4"))) + 1  # continua numerando (ignora cachés .npy)
 
 while True:
     ret, frame = cap.read()
@@ -44,15 +84,25 @@ while True:
         print(f"🔴 Grabando video {contador}: {nombre_video}")
         out = cv2.VideoWriter(str(nombre_video), cv2.VideoWriter_fourcc(*'mp4v'), fps, (ancho, alto))
         
+        # La codificación mp4v corre en otro hilo para no retrasar cap.read()
+        cola = queue.Queue(maxsize=TAMANO_COLA_ESCRITURA)
+        escritor = threading.Thread(target=escribir_frames, args=(cola, out), daemon=True)
+        escritor.start()
+        
         inicio = time.time()
         while time.time() - inicio < duracion:
             ret, frame = cap.read()
             if not ret:
                 break
-            out.write(frame)
+            # cap.read() entrega un array nuevo cada vez: no hace falta copiarlo
+            cola.put(frame)
             cv2.imshow("Grabando...", frame)
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 break
+        
+        # Vaciar la cola antes de cerrar el archivo
+        cola.put(None)
+        escritor.join()
         out.release()
         print("✅ Clip guardado.\n")
         contador += 1
@@ -18,11 +18,12 @@ from .repositories import (
 
 from .training_service import (
     ModelTrainingService,
-    StandardTrainingStrategy
+    StandardTrainingStrategy,
+    DistillationTrainingStrategy
 )
 
 try:
-    from .model import GestureNet
+    from .model import GestureNet, GestureNetStudent
 except ImportError:
     pass
 
@@ -37,5 +38,7 @@ __all__ = [
     'JsonGestureRepository',
     'ModelTrainingService',
     'StandardTrainingStrategy',
-    'GestureNet'
+    'DistillationTrainingStrategy',
+    'GestureNet',
+    'GestureNetStudent'
 ]
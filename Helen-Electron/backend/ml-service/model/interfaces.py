@@ -44,7 +44,7 @@ class IModelSaver(ABC):
         pass
     
     @abstractmethod
-    def load_model(self, model: torch.nn.Module, path: Path) -> torch.nn.Module:
+    def load_model(self, model: torch.nn.Module, path: Path, quantize: bool = False) -> torch.nn.Module:
         """Carga un modelo existente"""
         pass
     
@@ -10,10 +10,27 @@ CONFIGURACIÓN OPTIMIZADA mediante Random Search (Val Accuracy: 99.5%)
 - Batch Size: 24 (recomendado)
 """
 
+import copy
+import platform
+
 import torch
 import torch.nn as nn
 
 
+def select_quantized_engine():
+    """
+    Elige el backend de kernels int8: fbgemm en x86, qnnpack en ARM
+    
+    Returns:
+        str: Engine activo en torch.backends.quantized.engine
+    """
+    is_arm = platform.machine().lower() in ('arm64', 'aarch64', 'armv7l')
+    preferred = 'qnnpack' if is_arm else 'fbgemm'
+    if preferred in torch.backends.quantized.supported_engines:
+        torch.backends.quantized.engine = preferred
+    return torch.backends.quantized.engine
+
+
 class GestureNet(nn.Module):
     """
     Red Neuronal LSTM para clasificación de gestos basada en secuencias temporales
@@ -24,15 +41,19 @@ class GestureNet(nn.Module):
         num_layers (int): Número de capas LSTM apiladas (default: 3 - OPTIMIZADO)
         output_size (int): Número de clases/gestos a clasificar (dinámico según gestures_map.json)
         dropout (float): Tasa de dropout entre capas LSTM (default: 0.35 - OPTIMIZADO)
+        bidirectional (bool): LSTM bidireccional (default: True); False permite inferencia en streaming
     """
     
-    def __init__(self, input_size=126, hidden_size=128, num_layers=3, output_size=2, dropout=0.35):
+    def __init__(self, input_size=126, hidden_size=128, num_layers=3, output_size=2, dropout=0.35,
+                 bidirectional=True):
         super(GestureNet, self).__init__()
         
         self.input_size = input_size
         self.hidden_size = hidden_size
         self.num_layers = num_layers
         self.output_size = output_size
+        self.bidirectional = bidirectional
+        self.num_directions = 2 if bidirectional else 1
         
         # Capa LSTM bidireccional para capturar patrones temporales
         # batch_first=True: entrada de forma (batch_size, seq_length, input_size)
@@ -42,15 +63,17 @@ class GestureNet(nn.Module):
             num_layers=num_layers,
             batch_first=True,
             dropout=dropout if num_layers > 1 else 0,  # Dropout entre capas LSTM
-            bidirectional=True  # Procesa secuencia en ambas direcciones
+            bidirectional=bidirectional  # Procesa secuencia en ambas direcciones
         )
+        # Pesos contiguos para que cuDNN use el kernel LSTM fusionado
+        self.lstm.flatten_parameters()
         
         # Capa de normalización para estabilizar el entrenamiento
-        self.batch_norm = nn.BatchNorm1d(hidden_size * 2)  # *2 por bidireccional
+        self.batch_norm = nn.BatchNorm1d(hidden_size * self.num_directions)  # *2 si es bidireccional
         
         # Capas fully connected para clasificación
         self.fc = nn.Sequential(
-            nn.Linear(hidden_size * 2, hidden_size),  # *2 por bidireccional
+            nn.Linear(hidden_size * self.num_directions, hidden_size),  # *2 si es bidireccional
             nn.ReLU(),
             nn.Dropout(dropout),
             nn.Linear(hidden_size, hidden_size // 2),
@@ -59,6 +82,26 @@ class GestureNet(nn.Module):
             nn.Linear(hidden_size // 2, output_size)
         )
         
+        # Normalización z-score opcional dentro del modelo (ver set_normalization).
+        # No persistente: las estadísticas siguen guardándose en normalization_stats.pth
+        # y los state_dict existentes cargan sin cambios.
+        self.register_buffer('input_mean', None, persistent=False)
+        self.register_buffer('input_inv_std', None, persistent=False)
+        
+    def _apply(self, fn, *args, **kwargs):
+        """
+        Re-aplana los pesos del LSTM tras .to()/.cuda()/.half()
+        
+        nn.LSTM solo reinicia sus referencias al mover el módulo: en GPU los pesos
+        quedan en bloques separados y cuDNN los copia a un buffer contiguo en cada
+        forward. Aplanarlos una vez aquí evita esa copia sin pagarla por llamada.
+        """
+        module = super()._apply(fn, *args, **kwargs)
+        # El LSTM cuantizado (quantize_dynamic) no tiene pesos cuDNN que aplanar
+        if isinstance(self.lstm, nn.LSTM):
+            self.lstm.flatten_parameters()
+        return module
+    
     def forward(self, x):
         """
         Forward pass de la red
@@ -72,6 +115,13 @@ class GestureNet(nn.Module):
         Returns:
             torch.Tensor: Logits de salida con forma (batch_size, output_size)
         """
+        # Normalización del entrenamiento como primera operación (x - μ) * (1 / σ)
+        if self.input_mean is not None:
+            x = (x - self.input_mean) * self.input_inv_std
+        
+        # Una vista no contigua deshabilita el camino fusionado de cuDNN
+        x = x.contiguous()
+        
         # LSTM procesa toda la secuencia
         # lstm_out: (batch_size, seq_length, hidden_size * 2)
         # hn: (num_layers * 2, batch_size, hidden_size) - estados finales
@@ -81,8 +131,14 @@ class GestureNet(nn.Module):
         # Tomamos el último hidden state de ambas direcciones
         # hn[-2]: última capa, dirección forward
         # hn[-1]: última capa, dirección backward
-        # Concatenamos ambas direcciones
-        hidden = torch.cat((hn[-2], hn[-1]), dim=1)  # (batch_size, hidden_size * 2)
+        # (2, B, H) -> (B, 2, H) -> (B, 2H): mismo orden [forward, backward] que
+        # torch.cat, en una sola operación que el fuser encadena con el head
+        # Nota: lstm_out[:, -1] NO es equivalente. Su mitad backward es el primer
+        # paso de esa dirección (solo vio el último frame); el estado final backward
+        # está en lstm_out[:, 0, H:], y reunir ambas mitades desde lstm_out exige
+        # la misma copia que aquí, además de romper la paridad con los pesos entrenados.
+        # Sin bidireccional, hn[-1:] es solo el estado final forward de la última capa
+        hidden = hn[-self.num_directions:].transpose(0, 1).reshape(x.size(0), -1)  # (batch_size, hidden_size * 2)
         
         # Normalización por batch
         hidden = self.batch_norm(hidden)
@@ -92,6 +148,166 @@ class GestureNet(nn.Module):
         
         return output
     
+    @torch.no_grad()
+    def fold_batch_norm(self):
+        """
+        Fusiona batch_norm dentro de la primera capa Linear del head (solo inferencia)
+        
+        En eval, BatchNorm1d es un afín x * s + (β - μ * s) con s = γ / sqrt(σ² + ε),
+        así que se puede absorber en fc[0]: W' = W * s, b' = b + W @ (β - μ * s).
+        batch_norm se reemplaza por nn.Identity, eliminando un kernel por forward.
+        
+        Debe llamarse después de load_state_dict: el state_dict resultante ya
+        no contiene las claves de batch_norm.
+        """
+        if isinstance(self.batch_norm, nn.Identity):
+            return self
+        
+        bn = self.batch_norm
+        linear = self.fc[0]
+        
+        scale = bn.weight / torch.sqrt(bn.running_var + bn.eps)
+        shift = bn.bias - bn.running_mean * scale
+        
+        # El bias usa los pesos originales, así que se actualiza primero
+        linear.bias.add_(linear.weight @ shift)
+        linear.weight.mul_(scale)
+        
+        self.batch_norm = nn.Identity()
+        return self
+    
+    def set_normalization(self, mean, std):
+        """
+        Registra las estadísticas de normalización para aplicarlas dentro del forward
+        
+        El modelo pasa a recibir landmarks sin normalizar. Se guarda 1/σ para
+        cambiar la división por una multiplicación, y los buffers siguen al
+        modelo en .to(device).
+        
+        Args:
+            mean: Media por feature (tensor/array broadcastable a (1, 1, input_size))
+            std: Desviación estándar por feature (misma forma que mean)
+        """
+        device = next(self.parameters()).device
+        mean = torch.as_tensor(mean, dtype=torch.float32, device=device).reshape(1, 1, -1)
+        std = torch.as_tensor(std, dtype=torch.float32, device=device).reshape(1, 1, -1)
+        
+        # Features constantes en el entrenamiento (p.ej. una mano que nunca aparece)
+        # tienen σ ≈ 1e-8: normalizadas valían siempre 0, y 1/σ desbordaría en FP16
+        # al fusionarlo en los pesos. Se les asigna escala 0, que reproduce ese valor.
+        self.input_mean = mean
+        self.input_inv_std = torch.where(std > 1e-6, 1.0 / std, torch.zeros_like(std))
+        return self
+    
+    @torch.no_grad()
+    def fold_normalization(self):
+        """
+        Absorbe la normalización registrada en los pesos de entrada del LSTM (solo inferencia)
+        
+        La primera capa solo ve x a través de W_ih @ x + b_ih, así que con
+        x' = (x - μ) * s basta W' = W * s y b' = b - W' @ μ en ambas
+        direcciones: el forward queda sin operaciones elementwise extra.
+        """
+        if self.input_mean is None:
+            return self
+        
+        mean = self.input_mean.reshape(-1)
+        inv_std = self.input_inv_std.reshape(-1)
+        
+        for suffix in ('', '_reverse')[:self.num_directions]:
+            weight = getattr(self.lstm, f'weight_ih_l0{suffix}')
+            bias = getattr(self.lstm, f'bias_ih_l0{suffix}')
+            weight.mul_(inv_std)
+            bias.sub_(weight @ mean)
+        
+        self.input_mean = None
+        self.input_inv_std = None
+        return self
+    
+    def prepare_for_inference(self):
+        """
+        Deja el modelo listo para servir: eval, BN y normalización fusionadas y sin Dropout
+        
+        Los Dropout del head son no-ops en eval, pero siguen siendo nodos del
+        grafo; reemplazarlos por nn.Identity permite que TorchScript/Inductor
+        fusionen la cadena Linear -> ReLU -> Linear completa.
+        """
+        self.eval()
+        self.fold_batch_norm()
+        self.fold_normalization()
+        
+        for idx, layer in enumerate(self.fc):
+            if isinstance(layer, nn.Dropout):
+                self.fc[idx] = nn.Identity()
+        
+        self.lstm.flatten_parameters()
+        return self
+    
+    def quantize(self):
+        """
+        Cuantización dinámica INT8 de LSTM y Linear para inferencia en CPU
+        
+        Los pesos se guardan en int8 (~4x menos memoria) y las activaciones se
+        cuantizan al vuelo; en x86 con VNNI (Cascade Lake+) oneDNN/fbgemm usa
+        los GEMM int8 automáticamente. Llamar después de load_state_dict.
+        
+        BatchNorm no está en el mapeo: prepare_for_inference ya la fusionó en fc.
+        La fusión se hace sobre una copia, así que self conserva BN y normalización.
+        
+        Returns:
+            nn.Module: Copia cuantizada del modelo (self no se modifica)
+        """
+        select_quantized_engine()
+        prepared = copy.deepcopy(self).prepare_for_inference()
+        # inplace=True sobre la copia: sin una segunda copia dentro de quantize_dynamic
+        return torch.ao.quantization.quantize_dynamic(
+            prepared, {nn.LSTM, nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+    
+    def compile_for_inference(self, batch_sizes=(24,), seq_length=40, device=None,
+                              mode='reduce-overhead', fullgraph=False):
+        """
+        Compila el modelo con torch.compile y lo precalienta para formas fijas
+        
+        Con dynamic=False Inductor especializa un grafo por forma de entrada y,
+        en GPU, mode='reduce-overhead' lo captura como CUDA Graph, eliminando el
+        overhead de despacho por operación que domina en un LSTM tan pequeño.
+        
+        Args:
+            batch_sizes (iterable): Tamaños de batch a precompilar (default: 24, el de entrenamiento)
+            seq_length (int): Longitud de secuencia (frames)
+            device (torch.device): Device de los datos (default: el de los parámetros)
+            mode (str): Modo de torch.compile
+            fullgraph (bool): Exigir un único grafo sin graph breaks
+        
+        Returns:
+            nn.Module: Módulo compilado; el original (self) queda intacto para state_dict
+        """
+        device = device or next(self.parameters()).device
+        self.prepare_for_inference()
+        
+        compiled = torch.compile(self, mode=mode, fullgraph=fullgraph, dynamic=False)
+        
+        with torch.inference_mode():
+            for batch_size in batch_sizes:
+                compiled(torch.zeros(batch_size, seq_length, self.input_size, device=device))
+        
+        return compiled
+    
+    def to_torchscript(self):
+        """
+        Exporta el modelo a TorchScript (torch.jit.script) para servirlo sin Python
+        
+        El forward queda como un único grafo que también se puede cargar desde
+        C++ (torch::jit::load). Entrenar siempre en modo eager; esto es solo
+        para el artefacto de inferencia.
+        
+        Returns:
+            torch.jit.ScriptModule: Modelo scripted (self queda preparado para inferencia)
+        """
+        self.prepare_for_inference()
+        return torch.jit.script(self)
+    
     def get_model_info(self):
         """
         Retorna información del modelo para logging
@@ -106,10 +322,51 @@ class GestureNet(nn.Module):
             'output_size': self.output_size,
             'total_params': total_params,
             'trainable_params': trainable_params,
-            'bidirectional': True
+            'bidirectional': self.bidirectional
         }
 
 
+class GestureNetStudent(GestureNet):
+    """
+    Versión unidireccional y reducida de GestureNet, entrenada por destilación
+    
+    Sin la dirección backward el LSTM no necesita la secuencia completa: step()
+    avanza frame a frame reutilizando (h, c), y tras el último frame da los
+    mismos logits que forward() sobre la secuencia entera. Con hidden_size=96
+    y 2 capas cuesta ~15% de los FLOPs por frame del LSTM del maestro.
+    Se entrena con DistillationTrainingStrategy (ver training_service.py).
+    """
+    
+    def __init__(self, input_size=126, hidden_size=96, num_layers=2, output_size=2, dropout=0.35):
+        super(GestureNetStudent, self).__init__(
+            input_size=input_size,
+            hidden_size=hidden_size,
+            num_layers=num_layers,
+            output_size=output_size,
+            dropout=dropout,
+            bidirectional=False
+        )
+    
+    def step(self, frame, state=None):
+        """
+        Procesa un único frame (inferencia en streaming)
+        
+        Args:
+            frame (torch.Tensor): Landmarks del frame con forma (batch_size, input_size)
+            state (tuple): (h, c) devuelto por la llamada anterior, o None al empezar
+        
+        Returns:
+            tuple: (logits (batch_size, output_size), nuevo estado (h, c))
+        """
+        if self.input_mean is not None:
+            frame = (frame - self.input_mean[:, 0]) * self.input_inv_std[:, 0]
+        
+        # Secuencia de longitud 1: mismos pesos y kernel que forward(), sin LSTMCell aparte
+        _, state = self.lstm(frame.unsqueeze(1), state)
+        hidden = self.batch_norm(state[0][-1])
+        return self.fc(hidden), state
+
+
 if __name__ == "__main__":
     # Test del modelo
     print("🧪 Testing GestureNet...")
@@ -4,8 +4,10 @@ Cada clase tiene una única responsabilidad bien definida
 """
 
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
+import copy
 import json
+import os
 import numpy as np
 import torch
 from .interfaces import IDataLoader, IModelSaver, IGestureRepository
@@ -21,20 +23,46 @@ class FileDataLoader(IDataLoader):
         self.base_dir = Path(base_dir)
         self.x_data_path = self.base_dir / "X_data.npy"
         self.y_labels_path = self.base_dir / "Y_labels.npy"
+        self.norm_stats_path = self.base_dir / "norm_stats.npz"
     
     def load_training_data(self) -> Tuple[np.ndarray, np.ndarray]:
-        """Carga X_data.npy y Y_labels.npy"""
+        """
+        Carga X_data.npy y Y_labels.npy como memmap de solo lectura
+        
+        Los datos no se leen completos a RAM al abrir: las páginas se cargan bajo
+        demanda y el consumidor decide cuándo materializar (y en qué dtype).
+        """
         if not self.data_exists():
             raise FileNotFoundError(
                 f"No se encontraron datos en {self.base_dir}. "
                 "Ejecuta data_prep.py primero."
             )
         
-        X = np.load(self.x_data_path)
-        Y = np.load(self.y_labels_path)
+        X = np.load(self.x_data_path, mmap_mode='r')
+        Y = np.load(self.y_labels_path, mmap_mode='r')
         
         return X, Y
     
+    def load_normalization_stats(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Carga (mean, std) cacheados junto a X_data.npy
+        
+        Returns:
+            (mean, std), o None si no hay caché o es más vieja que X_data.npy
+            (data_prep.py regeneró los datos)
+        """
+        if not self.norm_stats_path.exists() or not self.x_data_path.exists():
+            return None
+        if self.norm_stats_path.stat().st_mtime < self.x_data_path.stat().st_mtime:
+            return None
+        
+        with np.load(self.norm_stats_path) as stats:
+            return stats['mean'], stats['std']
+    
+    def save_normalization_stats(self, mean: np.ndarray, std: np.ndarray) -> None:
+        """Guarda (mean, std) de X_data.npy para los siguientes entrenamientos"""
+        np.savez(self.norm_stats_path, mean=mean, std=std)
+    
     def data_exists(self) -> bool:
         """Verifica que existan ambos archivos de datos"""
         return self.x_data_path.exists() and self.y_labels_path.exists()
@@ -50,14 +78,48 @@ class TorchModelSaver(IModelSaver):
         """Guarda el state_dict del modelo"""
         torch.save(model.state_dict(), path)
     
-    def load_model(self, model: torch.nn.Module, path: Path) -> torch.nn.Module:
-        """Carga el state_dict en un modelo existente"""
+    def load_model(self, model: torch.nn.Module, path: Path, quantize: bool = False) -> torch.nn.Module:
+        """
+        Carga el state_dict en un modelo existente
+        
+        Con quantize=True devuelve una copia con LSTM y Linear en INT8 dinámico
+        (solo para inferencia en CPU; ver GestureNet.quantize)
+        """
         model.load_state_dict(torch.load(path, map_location='cpu'))
+        if quantize:
+            return model.quantize()
         return model
     
+    def save_scripted(self, model: torch.nn.Module, path: Path) -> None:
+        """
+        Guarda el modelo como TorchScript listo para inferencia
+        
+        Se exporta una copia en CPU (BN y Dropout ya fusionados); el modelo
+        recibido no se modifica y puede seguir entrenándose o guardándose como state_dict.
+        """
+        export = copy.deepcopy(model).cpu().eval()
+        if hasattr(export, 'to_torchscript'):
+            scripted = export.to_torchscript()
+        else:
+            scripted = torch.jit.script(export)
+        torch.jit.save(scripted, str(path))
+    
+    def load_scripted(self, path: Path, device: str = 'cpu') -> torch.jit.ScriptModule:
+        """Carga un modelo TorchScript guardado con save_scripted (no necesita GestureNet)"""
+        return torch.jit.load(str(path), map_location=device).eval()
+    
     def save_normalization_stats(self, stats: Dict, path: Path) -> None:
-        """Guarda estadísticas de normalización (mean, std)"""
+        """
+        Guarda estadísticas de normalización (mean, std)
+        
+        Además del .pth (que usan la API y las herramientas), escribe una copia
+        .npz al lado: se carga con numpy, sin unpickling ni la maquinaria de torch.load
+        """
         torch.save(stats, path)
+        np.savez(
+            Path(path).with_suffix('.npz'),
+            **{k: torch.as_tensor(v).cpu().numpy() for k, v in stats.items()}
+        )
 
 
 class JsonGestureRepository(IGestureRepository):
@@ -82,10 +144,23 @@ class JsonGestureRepository(IGestureRepository):
         return self._gestures_map.copy()
     
     def save_gestures_map(self, gestures_map: Dict[str, int]) -> None:
-        """Guarda el mapeo de gestos en JSON"""
+        """
+        Guarda el mapeo de gestos en JSON
+        
+        Escribe a un .tmp y lo renombra con os.replace: un corte a mitad de
+        escritura nunca deja un gestures_map.json truncado.
+        """
         self._gestures_map = gestures_map
-        with open(self.gestures_map_path, 'w') as f:
+        tmp_path = self.gestures_map_path.with_name(self.gestures_map_path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
             json.dump(gestures_map, f, indent=2)
+        os.replace(tmp_path, self.gestures_map_path)
+    
+    def _assign_id(self, gesture_name: str) -> int:
+        """Asigna el siguiente ID libre en memoria (sin guardar)"""
+        if gesture_name not in self._gestures_map:
+            self._gestures_map[gesture_name] = len(self._gestures_map)
+        return self._gestures_map[gesture_name]
     
     def add_gesture(self, gesture_name: str) -> int:
         """
@@ -97,15 +172,28 @@ class JsonGestureRepository(IGestureRepository):
         if gesture_name in self._gestures_map:
             return self._gestures_map[gesture_name]
         
-        # Asignar nuevo ID
-        new_id = len(self._gestures_map)
-        self._gestures_map[gesture_name] = new_id
+        new_id = self._assign_id(gesture_name)
         
         # Guardar automáticamente
         self.save_gestures_map(self._gestures_map)
         
         return new_id
     
+    def add_gestures(self, gesture_names: Iterable[str]) -> List[int]:
+        """
+        Agrega varios gestos y guarda el JSON una sola vez al final
+        
+        Returns:
+            List[int]: ID de cada gesto, en el mismo orden
+        """
+        count_before = len(self._gestures_map)
+        ids = [self._assign_id(name) for name in gesture_names]
+        
+        if len(self._gestures_map) != count_before:
+            self.save_gestures_map(self._gestures_map)
+        
+        return ids
+    
     def get_gesture_count(self) -> int:
         """Retorna el número de gestos registrados"""
         return len(self._gestures_map)
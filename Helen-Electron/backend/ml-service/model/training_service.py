@@ -7,15 +7,66 @@ from pathlib import Path
 from typing import Dict, Optional
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 import torch.optim as optim
 from torch.utils.data import DataLoader, TensorDataset
-from sklearn.model_selection import train_test_split
 import numpy as np
 
 from .interfaces import IDataLoader, IModelSaver, IGestureRepository, ITrainingStrategy
 from .model import GestureNet
 
 
+def bf16_supported(device: torch.device) -> bool:
+    """
+    Indica si el dispositivo ejecuta bfloat16 de forma nativa
+    
+    En CPU solo vale la pena con AVX-512 BF16 / AMX (detectado por oneDNN);
+    sin ese soporte autocast bf16 se emula y es más lento que fp32.
+    """
+    if device.type == 'cuda':
+        return torch.cuda.is_bf16_supported()
+    if device.type == 'cpu':
+        try:
+            return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+        except (AttributeError, RuntimeError):
+            return False
+    return False
+
+
+def stratified_split_indices(labels: np.ndarray, validation_split: float, seed: int = 42) -> tuple:
+    """
+    Índices de un split train/validación estratificado por clase
+    
+    Baraja los índices de cada clase con un generador fijo y reserva la fracción
+    validation_split de cada una para validación (al menos un ejemplo si la clase
+    tiene dos o más). Si aun así la validación queda vacía (todas las clases con un
+    solo ejemplo), se mueve uno de la clase más grande para que no lo esté.
+    
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (train_idx, val_idx)
+    """
+    rng = np.random.default_rng(seed)
+    labels = np.asarray(labels)
+    train_parts, val_parts = [], []
+    
+    for cls in np.unique(labels):
+        idx = rng.permutation(np.flatnonzero(labels == cls))
+        n_val = int(round(len(idx) * validation_split))
+        if len(idx) > 1:
+            n_val = min(max(n_val, 1), len(idx) - 1)
+        val_parts.append(idx[:n_val])
+        train_parts.append(idx[n_val:])
+    
+    if sum(len(part) for part in val_parts) == 0 and len(labels) > 1:
+        largest = max(range(len(train_parts)), key=lambda i: len(train_parts[i]))
+        val_parts[largest] = train_parts[largest][:1]
+        train_parts[largest] = train_parts[largest][1:]
+    
+    train_idx = rng.permutation(np.concatenate(train_parts))
+    val_idx = np.sort(np.concatenate(val_parts))
+    return train_idx, val_idx
+
+
 class StandardTrainingStrategy(ITrainingStrategy):
     """
     Estrategia estándar de entrenamiento (Strategy Pattern)
@@ -23,10 +74,24 @@ class StandardTrainingStrategy(ITrainingStrategy):
     
     PARÁMETROS OPTIMIZADOS (Random Search - 99.5% accuracy):
     - Learning Rate: 0.0005
+    
+    En GPUs con soporte bfloat16, y en CPUs con AVX-512 BF16 / AMX, el forward
+    corre bajo autocast bf16: los GEMM del LSTM mueven la mitad de bytes y, al
+    tener el mismo rango que fp32, no hace falta GradScaler.
     """
     
-    def __init__(self, learning_rate: float = 0.0005):
+    def __init__(self, learning_rate: float = 0.0005, use_amp: bool = True, use_compile: bool = False):
+        """
+        Args:
+            learning_rate: Learning rate de Adam
+            use_amp: Autocast bf16 si el dispositivo lo soporta de forma nativa
+            use_compile: Compilar el modelo con torch.compile (requiere un backend
+                de Inductor funcional, p.ej. Triton en GPU); opcional porque la
+                compilación inicial solo compensa en entrenamientos largos
+        """
         self.learning_rate = learning_rate
+        self.use_amp = use_amp
+        self.use_compile = use_compile
     
     def train(
         self,
@@ -43,7 +108,20 @@ class StandardTrainingStrategy(ITrainingStrategy):
             Dict con métricas finales: best_val_acc, final_train_loss, etc.
         """
         criterion = nn.CrossEntropyLoss()
-        optimizer = optim.Adam(model.parameters(), lr=self.learning_rate)
+        # En GPU, Adam fusionado actualiza los ~30 tensores del modelo en un solo
+        # kernel; en CPU, foreach agrupa las operaciones por lista de tensores
+        if device.type == 'cuda':
+            optimizer = optim.Adam(model.parameters(), lr=self.learning_rate, fused=True)
+        else:
+            optimizer = optim.Adam(model.parameters(), lr=self.learning_rate, foreach=True)
+        
+        amp_enabled = self.use_amp and bf16_supported(device)
+        
+        # El módulo compilado comparte parámetros con model: el state_dict que guarda
+        # el servicio sigue siendo el de model, sin el prefijo _orig_mod
+        step_model = model
+        if self.use_compile:
+            step_model = torch.compile(model, mode='reduce-overhead' if device.type == 'cuda' else 'default')
         
         best_val_acc = 0.0
         metrics = {
@@ -57,47 +135,52 @@ class StandardTrainingStrategy(ITrainingStrategy):
         for epoch in range(epochs):
             # Training phase
             model.train()
-            train_loss = 0.0
-            train_correct = 0
+            # Acumuladores en el dispositivo: una sola sincronización por época
+            # en lugar de dos .item() por batch
+            train_loss_sum = torch.zeros((), device=device)
+            train_correct = torch.zeros((), dtype=torch.long, device=device)
             train_total = 0
             
             for batch_x, batch_y in train_loader:
-                batch_x, batch_y = batch_x.to(device), batch_y.to(device)
+                batch_x = batch_x.to(device, non_blocking=True)
+                batch_y = batch_y.to(device, non_blocking=True)
                 
                 optimizer.zero_grad()
-                outputs = model(batch_x)
-                loss = criterion(outputs, batch_y)
+                with torch.autocast(device_type=device.type, dtype=torch.bfloat16, enabled=amp_enabled):
+                    outputs = step_model(batch_x)
+                    loss = self.compute_loss(outputs, batch_x, batch_y, criterion)
                 loss.backward()
                 optimizer.step()
                 
-                train_loss += loss.item()
-                _, predicted = torch.max(outputs.data, 1)
+                train_loss_sum += loss.detach()
                 train_total += batch_y.size(0)
-                train_correct += (predicted == batch_y).sum().item()
+                train_correct += (outputs.detach().argmax(dim=1) == batch_y).sum()
             
-            train_loss /= len(train_loader)
-            train_acc = train_correct / train_total  # Cambiado: sin multiplicar por 100
+            train_loss = train_loss_sum.item() / max(len(train_loader), 1)
+            train_acc = train_correct.item() / max(train_total, 1)  # Cambiado: sin multiplicar por 100
             
             # Validation phase
             model.eval()
-            val_loss = 0.0
-            val_correct = 0
+            val_loss_sum = torch.zeros((), device=device)
+            val_correct = torch.zeros((), dtype=torch.long, device=device)
             val_total = 0
             
-            with torch.no_grad():
+            with torch.inference_mode():
                 for batch_x, batch_y in val_loader:
-                    batch_x, batch_y = batch_x.to(device), batch_y.to(device)
+                    batch_x = batch_x.to(device, non_blocking=True)
+                    batch_y = batch_y.to(device, non_blocking=True)
                     
-                    outputs = model(batch_x)
-                    loss = criterion(outputs, batch_y)
+                    with torch.autocast(device_type=device.type, dtype=torch.bfloat16, enabled=amp_enabled):
+                        outputs = step_model(batch_x)
+                        loss = criterion(outputs, batch_y)
                     
-                    val_loss += loss.item()
-                    _, predicted = torch.max(outputs.data, 1)
+                    val_loss_sum += loss
                     val_total += batch_y.size(0)
-                    val_correct += (predicted == batch_y).sum().item()
+                    val_correct += (outputs.argmax(dim=1) == batch_y).sum()
             
-            val_loss /= len(val_loader)
-            val_acc = val_correct / val_total  # Cambiado: sin multiplicar por 100
+            # Con un split vacío (dataset de un solo ejemplo) las métricas quedan en 0
+            val_loss = val_loss_sum.item() / max(len(val_loader), 1)
+            val_acc = val_correct.item() / max(val_total, 1)  # Cambiado: sin multiplicar por 100
             
             # Update best accuracy
             if val_acc > best_val_acc:
@@ -122,6 +205,71 @@ class StandardTrainingStrategy(ITrainingStrategy):
             }
         
         return metrics
+    
+    def compute_loss(self, outputs, batch_x, batch_y, criterion):
+        """Loss de entrenamiento (validación siempre usa criterion)"""
+        return criterion(outputs, batch_y)
+
+
+class DistillationTrainingStrategy(StandardTrainingStrategy):
+    """
+    Destilación de conocimiento (Strategy Pattern)
+    Entrena un modelo alumno (p.ej. GestureNetStudent) imitando a un maestro ya entrenado
+    
+    loss = α · CE(alumno, y) + (1 - α) · T² · KL(softmax(maestro / T) || softmax(alumno / T))
+    
+    El factor T² mantiene la magnitud de los gradientes de la parte blanda
+    comparable a la de CE al subir la temperatura.
+    """
+    
+    def __init__(
+        self,
+        teacher: torch.nn.Module,
+        alpha: float = 0.5,
+        temperature: float = 4.0,
+        learning_rate: float = 0.0005,
+        use_amp: bool = True,
+        use_compile: bool = False
+    ):
+        """
+        Args:
+            teacher: Modelo maestro entrenado (GestureNet con sus pesos cargados)
+            alpha: Peso de la loss con las etiquetas reales
+            temperature: Temperatura para suavizar las distribuciones
+        """
+        super().__init__(learning_rate, use_amp, use_compile)
+        self.teacher = teacher
+        self.alpha = alpha
+        self.temperature = temperature
+    
+    def train(
+        self,
+        model: torch.nn.Module,
+        train_loader: DataLoader,
+        val_loader: DataLoader,
+        epochs: int,
+        device: torch.device
+    ) -> Dict[str, float]:
+        """Entrena el alumno (model) con el maestro congelado en eval"""
+        self.teacher.to(device).eval()
+        for param in self.teacher.parameters():
+            param.requires_grad_(False)
+        
+        return (yield from super().train(model, train_loader, val_loader, epochs, device))
+    
+    def compute_loss(self, outputs, batch_x, batch_y, criterion):
+        """Combina CE con las etiquetas y KL contra los logits del maestro"""
+        with torch.no_grad():
+            teacher_logits = self.teacher(batch_x)
+        
+        T = self.temperature
+        soft_loss = F.kl_div(
+            F.log_softmax(outputs.float() / T, dim=1),
+            F.softmax(teacher_logits.float() / T, dim=1),
+            reduction='batchmean'
+        ) * (T * T)
+        
+        return self.alpha * criterion(outputs, batch_y) + (1 - self.alpha) * soft_loss
 
 
 class ModelTrainingService:
@@ -144,26 +292,37 @@ class ModelTrainingService:
         model_saver: IModelSaver,
         gesture_repo: IGestureRepository,
         training_strategy: ITrainingStrategy,
-        device: Optional[torch.device] = None
+        device: Optional[torch.device] = None,
+        model_class: type = GestureNet
     ):
         """
         Constructor con Dependency Injection (Dependency Inversion Principle)
         No depende de implementaciones concretas, sino de interfaces
+        
+        model_class permite entrenar otra arquitectura con la misma firma
+        (p.ej. GestureNetStudent junto con DistillationTrainingStrategy)
         """
         self.data_loader = data_loader
         self.model_saver = model_saver
         self.gesture_repo = gesture_repo
         self.training_strategy = training_strategy
+        self.model_class = model_class
         self.device = device or torch.device('cuda' if torch.cuda.is_available() else 'cpu')
     
     def prepare_data(
         self,
         validation_split: float = 0.2,
-        batch_size: int = 16
+        batch_size: int = 16,
+        num_workers: int = 2
     ) -> tuple:
         """
         Prepara los datos para entrenamiento
         
+        Args:
+            validation_split: Fracción de datos para validación
+            batch_size: Tamaño de batch
+            num_workers: Procesos que arman los batches en paralelo (0 = en el proceso principal)
+        
         Returns:
             Tuple[DataLoader, DataLoader, int, Dict]: 
                 (train_loader, val_loader, n_classes, norm_stats)
@@ -171,32 +330,61 @@ class ModelTrainingService:
         # Cargar datos usando el repositorio
         X, Y = self.data_loader.load_training_data()
         
-        # Convertir a tensores
-        X_tensor = torch.FloatTensor(X)
-        Y_tensor = torch.LongTensor(Y)
+        # Convertir a tensores (X_data.npy se guarda en float16; se entrena en float32).
+        # X llega como memmap: esta es la única materialización en RAM, ya en float32
+        X_np = np.ascontiguousarray(X, dtype=np.float32)
+        if not X_np.flags.writeable:
+            X_np = X_np.copy()
+        X_tensor = torch.from_numpy(X_np)
+        Y_tensor = torch.from_numpy(np.array(Y, dtype=np.int64))
+        
+        # Normalización in-place: sin una segunda copia del tamaño del dataset.
+        # mean/std se cachean junto a X_data.npy (si el loader lo soporta) para no
+        # recorrer todo el dataset en cada entrenamiento con los mismos datos
+        cached = None
+        if hasattr(self.data_loader, 'load_normalization_stats'):
+            cached = self.data_loader.load_normalization_stats()
+        if cached is None:
+            # std_mean recorre X una sola vez y sin temporales (np.std materializa X - μ)
+            std, mean = torch.std_mean(X_tensor, dim=(0, 1), keepdim=True)
+            if hasattr(self.data_loader, 'save_normalization_stats'):
+                self.data_loader.save_normalization_stats(mean.reshape(-1).numpy(), std.reshape(-1).numpy())
+        else:
+            mean = torch.from_numpy(np.asarray(cached[0], dtype=np.float32)).reshape(1, 1, -1)
+            std = torch.from_numpy(np.asarray(cached[1], dtype=np.float32)).reshape(1, 1, -1)
         
-        # Normalización
-        mean = X_tensor.mean(dim=(0, 1), keepdim=True)
-        std = X_tensor.std(dim=(0, 1), keepdim=True) + 1e-8
-        X_tensor = (X_tensor - mean) / std
+        std = std + 1e-8
+        X_tensor.sub_(mean).div_(std)
         
         # Estadísticas de normalización para guardar
         norm_stats = {'mean': mean, 'std': std}
         
-        # Split train/validation
-        X_train, X_val, Y_train, Y_val = train_test_split(
-            X_tensor, Y_tensor,
-            test_size=validation_split,
-            random_state=42,
-            stratify=Y_tensor
-        )
+        # Split train/validation estratificado: indexa los tensores ya creados,
+        # sin pasar por NumPy ni duplicar X
+        train_idx, val_idx = stratified_split_indices(Y_tensor.numpy(), validation_split)
+        train_idx = torch.from_numpy(train_idx)
+        val_idx = torch.from_numpy(val_idx)
+        X_train, Y_train = X_tensor[train_idx], Y_tensor[train_idx]
+        X_val, Y_val = X_tensor[val_idx], Y_tensor[val_idx]
+        del X_tensor, X_np, X
         
         # Crear DataLoaders
         train_dataset = TensorDataset(X_train, Y_train)
         val_dataset = TensorDataset(X_val, Y_val)
         
-        train_loader = DataLoader(train_dataset, batch_size=batch_size, shuffle=True)
-        val_loader = DataLoader(val_dataset, batch_size=batch_size, shuffle=False)
+        # En GPU los batches salen en memoria pinned: la copia H2D es asíncrona
+        # (non_blocking en la estrategia) y se solapa con el cómputo
+        loader_kwargs = {'batch_size': batch_size, 'pin_memory': self.device.type == 'cuda'}
+        if num_workers > 0:
+            # Workers persistentes: no se vuelven a lanzar en cada época, que con
+            # épocas cortas costaría más que lo que ahorran
+            loader_kwargs.update(
+                num_workers=num_workers,
+                persistent_workers=True,
+                prefetch_factor=2
+            )
+        train_loader = DataLoader(train_dataset, shuffle=True, **loader_kwargs)
+        val_loader = DataLoader(val_dataset, shuffle=False, **loader_kwargs)
         
         # Obtener número de clases
         n_classes = self.gesture_repo.get_gesture_count()
@@ -209,11 +397,16 @@ class ModelTrainingService:
         batch_size: int = 24,  # OPTIMIZADO (Random Search)
         validation_split: float = 0.2,
         model_save_path: Optional[Path] = None,
-        norm_stats_path: Optional[Path] = None
+        norm_stats_path: Optional[Path] = None,
+        scripted_save_path: Optional[Path] = None
     ):
         """
         Ejecuta el entrenamiento del modelo
         
+        Args:
+            scripted_save_path: Si se indica, guarda además el mejor modelo como
+                TorchScript para inferencia (ver TorchModelSaver.save_scripted)
+        
         Yields:
             Dict con progreso de cada época
             
@@ -226,11 +419,15 @@ class ModelTrainingService:
         )
         
         # Crear modelo
-        model = GestureNet(output_size=n_classes).to(self.device)
+        model = self.model_class(output_size=n_classes).to(self.device)
         
-        # Variables para guardar mejor modelo
+        # Variables para guardar mejor modelo.
+        # state_dict() devuelve referencias a los tensores vivos: hay que copiar los
+        # valores. El buffer en CPU se reserva una vez (pinned en GPU para que la
+        # copia D2H sea asíncrona) y se sobrescribe en cada mejora.
         best_val_acc = 0.0
         best_model_state = None
+        pin = self.device.type == 'cuda'
         
         # Entrenar usando la estrategia
         for progress in self.training_strategy.train(
@@ -239,7 +436,15 @@ class ModelTrainingService:
             # Guardar mejor modelo
             if progress['val_acc'] > best_val_acc:
                 best_val_acc = progress['val_acc']
-                best_model_state = model.state_dict().copy()
+                if best_model_state is None:
+                    best_model_state = {
+                        k: torch.empty(v.shape, dtype=v.dtype, pin_memory=pin)
+                        for k, v in model.state_dict().items()
+                    }
+                for k, v in model.state_dict().items():
+                    best_model_state[k].copy_(v.detach(), non_blocking=pin)
+                if pin:
+                    torch.cuda.synchronize(self.device)
             
             # Yield progress para UI
             yield progress
@@ -252,6 +457,9 @@ class ModelTrainingService:
         if model_save_path:
             self.model_saver.save_model(model, model_save_path)
         
+        if scripted_save_path and hasattr(self.model_saver, 'save_scripted'):
+            self.model_saver.save_scripted(model, scripted_save_path)
+        
         if norm_stats_path:
             self.model_saver.save_normalization_stats(norm_stats, norm_stats_path)
         
@@ -3,14 +3,57 @@ Script para Probar el Modelo en Tiempo Real
 Abre la cámara, detecta gestos y muestra predicciones con nivel de confianza
 """
 
+import contextlib
 import cv2
 import torch
 import numpy as np
 import mediapipe as mp
 import json
+import queue
+import threading
 import time
 from pathlib import Path
+from types import SimpleNamespace
 from model.model import GestureNet
+from data_prep import landmarks_to_array
+
+
+# Frames en cola entre etapas del pipeline; pocas para no acumular latencia
+PIPELINE_QUEUE_SIZE = 2
+
+# Resolución de captura: MediaPipe Hands no necesita más y es el factor que más pesa en su costo
+CAPTURE_WIDTH = 640
+CAPTURE_HEIGHT = 480
+
+# Fila del buffer de manos según la etiqueta de handedness de MediaPipe
+LABEL_TO_SLOT = {'Left': 0, 'Right': 1}
+
+
+def load_normalization_stats(path):
+    """
+    Carga las estadísticas de normalización (mean, std)
+    
+    Prefiere la copia .npz junto al archivo (numpy, sin unpickling); si no existe,
+    por compatibilidad con modelos entrenados antes, usa torch.load sobre el .pth.
+    """
+    path = Path(path)
+    npz_path = path.with_suffix('.npz')
+    if npz_path.exists():
+        with np.load(npz_path) as stats:
+            return {'mean': stats['mean'], 'std': stats['std']}
+    return torch.load(path, map_location='cpu')
+
+
+def put_latest(frame_queue, item):
+    """Encola item descartando el más antiguo si la cola está llena (prioriza latencia)"""
+    try:
+        frame_queue.put_nowait(item)
+    except queue.Full:
+        try:
+            frame_queue.get_nowait()
+        except queue.Empty:
+            pass
+        frame_queue.put_nowait(item)
 
 
 class LiveGestureTester:
@@ -18,12 +61,15 @@ class LiveGestureTester:
     Clase para probar el modelo de reconocimiento de gestos en tiempo real
     """
     
-    def __init__(self, model_path: Path, gestures_map_path: Path, norm_stats_path: Path):
+    def __init__(self, model_path: Path, gestures_map_path: Path, norm_stats_path: Path,
+                 landmarker_model: Path = None):
         """
         Args:
             model_path: Ruta al modelo entrenado (.pth)
             gestures_map_path: Ruta al mapeo de gestos (gestures_map.json)
-            norm_stats_path: Ruta a las estadísticas de normalización (.pth)
+            norm_stats_path: Ruta a las estadísticas de normalización (.pth o .npz)
+            landmarker_model: Bundle hand_landmarker.task opcional; si se indica se usa
+                MediaPipe Tasks en modo LIVE_STREAM (asíncrono) en vez de mp.solutions
         """
         self.model_path = Path(model_path)
         self.gestures_map_path = Path(gestures_map_path)
@@ -33,37 +79,105 @@ class LiveGestureTester:
         with open(self.gestures_map_path, 'r') as f:
             self.gestures_map = json.load(f)
         
-        # Invertir el mapeo para obtener nombre por ID
-        self.id_to_gesture = {v: k for k, v in self.gestures_map.items()}
+        # Invertir el mapeo: lista indexada por ID (una entrada por salida del modelo)
+        self.gesture_names = ["Desconocido"] * len(self.gestures_map)
+        for name, gesture_id in self.gestures_map.items():
+            if 0 <= gesture_id < len(self.gesture_names):
+                self.gesture_names[gesture_id] = name
         
         # Cargar estadísticas de normalización
-        norm_stats = torch.load(self.norm_stats_path, map_location='cpu')
-        self.mean = norm_stats['mean']
-        self.std = norm_stats['std']
+        norm_stats = load_normalization_stats(self.norm_stats_path)
         
         # Cargar modelo
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        self.seq_length = 40  # Frames por secuencia (forma fija de entrada del modelo)
         self.model = GestureNet(output_size=len(self.gestures_map)).to(self.device)
         self.model.load_state_dict(torch.load(self.model_path, map_location=self.device))
-        self.model.eval()
+        
+        # La normalización pasa a formar parte del modelo y prepare_for_inference
+        # la absorbe (junto con BatchNorm) en los pesos: predict ya no la calcula
+        self.model.set_normalization(norm_stats['mean'], norm_stats['std'])
+        self.model.prepare_for_inference()
+        
+        # Precisión reducida: un LSTM tan pequeño está limitado por la lectura de pesos.
+        # GPU: FP16 (mitad de bytes). CPU: INT8 dinámico para LSTM + Linear
+        if self.device.type == 'cuda':
+            self.model = self.model.half()
+            self.input_dtype = torch.float16
+        else:
+            self.model = self.model.quantize()
+            self.input_dtype = torch.float32
+        
+        self.model = self._trace_model(self.model)
+        
+        # Buffers de entrada preasignados: staging en memoria pinned (copia H2D más rápida
+        # y asíncrona) y su destino en el dispositivo. En CPU ambos son el mismo tensor
+        on_cuda = self.device.type == 'cuda'
+        self._host_pinned = torch.empty(1, self.seq_length, 126, dtype=torch.float32, pin_memory=on_cuda)
+        if on_cuda:
+            self._dev_buf = torch.zeros(1, self.seq_length, 126, device=self.device, dtype=self.input_dtype)
+        else:
+            self._dev_buf = self._host_pinned
+        # Vista numpy (seq_length, 126) del staging: la secuencia se escribe aquí sin tensores intermedios
+        self._host_np = self._host_pinned.numpy()[0]
+        
+        # Forma fija (1, seq_length, 126): en GPU cada predicción es un replay de CUDA Graph
+        self._graph = None
+        if self.device.type == 'cuda':
+            self._capture_cuda_graph()
         
         # Inicializar MediaPipe
         self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
-            static_image_mode=False,
-            max_num_hands=2,
-            min_detection_confidence=0.5
-        )
+        self.live_stream = landmarker_model is not None
+        if self.live_stream:
+            self.hands = self._create_live_landmarker(landmarker_model)
+        else:
+            # model_complexity=0: modelo lite de landmarks, el mismo que usa data_prep.py.
+            # Tracking más permisivo que la detección: el detector de palma (la parte
+            # más costosa) solo se vuelve a ejecutar cuando el tracking se pierde de verdad
+            self.hands = self.mp_hands.Hands(
+                static_image_mode=False,
+                max_num_hands=2,
+                model_complexity=0,
+                min_detection_confidence=0.6,
+                min_tracking_confidence=0.4
+            )
         self.mp_drawing = mp.solutions.drawing_utils
+        self._last_timestamp_ms = 0
+        
+        # En LIVE_STREAM el buffer y la predicción se actualizan desde el callback de MediaPipe
+        self._state_lock = threading.Lock()
+        
+        # Buffer circular para secuencias: se sobrescribe la fila más antigua
+        # en lugar de hacer pop(0) y reconstruir el array en cada frame
+        self.frame_buffer = np.empty((self.seq_length, 126), dtype=np.float32)
+        self._buf_idx = 0  # Próxima fila a escribir (= la más antigua cuando está lleno)
+        self._buf_filled = 0  # Frames válidos en el buffer
+        
+        # Buffer de manos reutilizado en cada frame: fila 0 = izquierda, fila 1 = derecha.
+        # Su ravel() es la fila de 126 features sin copiar ni concatenar
+        self._hands_buf = np.zeros((2, 63), dtype=np.float32)
         
-        # Buffer para secuencias
-        self.seq_length = 40
-        self.frame_buffer = []
+        # Destino reutilizado de la conversión BGR -> RGB (se crea con el primer frame)
+        self._rgb_scratch = None
+        
+        # MediaPipe solo cada mp_stride frames; los frames saltados se reconstruyen
+        # por interpolación lineal entre las dos detecciones que los rodean
+        self.mp_stride = 2
+        self._frame_count = 0
+        self._last_landmarks = np.zeros(126, dtype=np.float32)
+        self._has_last_landmarks = False
+        self._interp_frame = np.empty(126, dtype=np.float32)
         
         # Control de tiempo
         self.last_prediction_time = 0
         self.prediction_delay = 2.0  # segundos
         
+        # Con el buffer lleno, MediaPipe se pausa durante el cooldown y se reanuda
+        # justo a tiempo para renovar la ventana completa antes de la siguiente predicción
+        self.capture_fps = 30.0  # Se actualiza con el valor real de la cámara en run()
+        self.resume_margin = 0.3  # segundos extra sobre la duración de la ventana
+        
         print(f"\n{'='*70}")
         print(f"✅ Modelo cargado exitosamente")
         print(f"📊 Dispositivo: {self.device}")
@@ -71,63 +185,179 @@ class LiveGestureTester:
         print(f"⏱️  Delay entre predicciones: {self.prediction_delay}s")
         print(f"{'='*70}\n")
     
+    def _trace_model(self, model, warmup_iters=3):
+        """
+        Traza y congela el modelo con TorchScript para la forma fija (1, seq_length, 126)
+        
+        Los pasos de calentamiento completan el profiling/fusión del JIT aquí,
+        en lugar de durante la primera predicción del usuario.
+        
+        Returns:
+            El módulo TorchScript congelado, o el modelo original si el trazado falla
+        """
+        dummy = torch.zeros(1, self.seq_length, 126, device=self.device, dtype=self.input_dtype)
+        try:
+            with torch.no_grad():
+                traced = torch.jit.freeze(torch.jit.trace(model, dummy))
+                for _ in range(warmup_iters):
+                    traced(dummy)
+            return traced
+        except Exception as e:
+            print(f"⚠️  No se pudo trazar el modelo con TorchScript, usando modo eager: {e}")
+            return model
+    
+    def _capture_cuda_graph(self, warmup_iters=3):
+        """
+        Captura forward + softmax + max en un torch.cuda.CUDAGraph sobre _dev_buf
+        
+        El modelo lanza muchos kernels pequeños, así que el overhead de lanzarlos
+        desde CPU domina la latencia; con el grafo cada predicción es un único replay.
+        Si la captura falla se sigue usando el forward normal.
+        """
+        try:
+            with torch.no_grad():
+                # Warmup en un stream lateral (requerido antes de capturar)
+                side_stream = torch.cuda.Stream()
+                side_stream.wait_stream(torch.cuda.current_stream())
+                with torch.cuda.stream(side_stream):
+                    for _ in range(warmup_iters):
+                        self.model(self._dev_buf)
+                torch.cuda.current_stream().wait_stream(side_stream)
+                
+                graph = torch.cuda.CUDAGraph()
+                with torch.cuda.graph(graph):
+                    probabilities = torch.softmax(self.model(self._dev_buf).float(), dim=1)
+                    self._g_conf, self._g_pred = torch.max(probabilities, 1)
+            self._graph = graph
+        except Exception as e:
+            print(f"⚠️  No se pudo capturar el CUDA Graph, usando forward normal: {e}")
+            self._graph = None
+    
+    def _create_live_landmarker(self, model_path, min_detection_confidence=0.6, min_tracking_confidence=0.4):
+        """
+        Crea un HandLandmarker de MediaPipe Tasks en modo LIVE_STREAM
+        
+        detect_async() no bloquea: el siguiente frame entra al grafo antes de que
+        termine el actual, y los resultados llegan a _on_hand_result.
+        """
+        from mediapipe.tasks.python import BaseOptions
+        from mediapipe.tasks.python import vision
+        
+        options = vision.HandLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=str(model_path)),
+            running_mode=vision.RunningMode.LIVE_STREAM,
+            num_hands=2,
+            min_hand_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence,
+            result_callback=self._on_hand_result
+        )
+        return vision.HandLandmarker.create_from_options(options)
+    
+    def _fill_hands_buf(self, hands, labels):
+        """
+        Escribe cada mano en su fila del buffer reutilizado
+        
+        Args:
+            hands: Manos detectadas (objetos con .landmark)
+            labels: Etiqueta de handedness de cada mano ('Left'/'Right')
+            
+        Returns:
+            np.array: Vista (126,) de left + right; se sobrescribe en la siguiente llamada
+        """
+        # Reiniciar el buffer reutilizado (un solo memset para ambas manos)
+        self._hands_buf.fill(0)
+        
+        # Iterar por las manos detectadas
+        for idx, hand_landmarks in enumerate(hands):
+            points = landmarks_to_array(hand_landmarks)
+            
+            # Slot por handedness; sin etiqueta, por la posición x de la muñeca
+            label = labels[idx] if idx < len(labels) else None
+            slot = LABEL_TO_SLOT.get(label, 0 if points[0] < 0.5 else 1)
+            self._hands_buf[slot] = points
+        
+        return self._hands_buf.ravel()
+    
+    def _on_hand_result(self, result, output_image, timestamp_ms):
+        """Callback de LIVE_STREAM: convierte el resultado de Tasks y actualiza buffer/predicción"""
+        if not result.hand_landmarks:
+            self.handle_landmarks(None)
+            return
+        
+        landmarks = self._fill_hands_buf(
+            [SimpleNamespace(landmark=hand) for hand in result.hand_landmarks],
+            [categories[0].category_name for categories in result.handedness]
+        )
+        self.handle_landmarks(landmarks)
+    
     def extract_landmarks_from_frame(self, frame):
         """
         Extrae landmarks de un frame usando MediaPipe
         
         Returns:
-            np.array: Vector de 126 features o None si no detecta manos
+            np.array: Vector de 126 features o None si no detecta manos.
+                Es un buffer reutilizado: se sobrescribe en la siguiente llamada
         """
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        if self._rgb_scratch is None or self._rgb_scratch.shape != frame.shape:
+            self._rgb_scratch = np.empty_like(frame)
+        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb_scratch)
         results = self.hands.process(frame_rgb)
         
         if results.multi_hand_landmarks:
-            # Preparar placeholders para left/right
-            left_vec = np.zeros(63, dtype=np.float32)
-            right_vec = np.zeros(63, dtype=np.float32)
-            
-            handedness = None
-            if hasattr(results, 'multi_handedness') and results.multi_handedness:
-                handedness = [h.classification[0].label for h in results.multi_handedness]
-            
-            # Iterar por las manos detectadas
-            for idx, hand_landmarks in enumerate(results.multi_hand_landmarks):
-                points = np.array(
-                    [[lm.x, lm.y, lm.z] for lm in hand_landmarks.landmark], 
-                    dtype=np.float32
-                ).flatten()
-                
-                assigned = False
-                # Intentar asignar por handedness
-                if handedness and idx < len(handedness):
-                    label = handedness[idx].lower()
-                    if 'left' in label:
-                        left_vec = points
-                        assigned = True
-                    elif 'right' in label:
-                        right_vec = points
-                        assigned = True
-                
-                # Fallback: usar posición x
-                if not assigned:
-                    try:
-                        wrist_x = points[0]
-                        if wrist_x < 0.5:
-                            left_vec = points
-                        else:
-                            right_vec = points
-                    except Exception:
-                        if np.all(left_vec == 0):
-                            left_vec = points
-                        else:
-                            right_vec = points
-            
-            # Concatenar left + right
-            combined = np.concatenate([left_vec, right_vec])
-            return combined
+            handedness = results.multi_handedness or ()
+            return self._fill_hands_buf(
+                results.multi_hand_landmarks,
+                [h.classification[0].label for h in handedness]
+            )
         
         return None
     
+    def push_frame(self, landmarks):
+        """Agrega un frame al buffer circular, descartando el más antiguo si está lleno"""
+        self.frame_buffer[self._buf_idx] = landmarks
+        self._buf_idx = (self._buf_idx + 1) % self.seq_length
+        self._buf_filled = min(self._buf_filled + 1, self.seq_length)
+    
+    def push_landmarks(self, landmarks):
+        """
+        Agrega una detección al buffer, interpolando antes los frames saltados por mp_stride
+        
+        Si la detección anterior no es contigua (hubo un frame sin manos) no se
+        interpola: igual que antes, los frames sin detección no entran al buffer.
+        
+        Solo se interpolan las manos (bloques de 63) presentes en ambas detecciones;
+        si una mano aparece o desaparece entre ellas, los frames saltados repiten la
+        detección actual para esa mano, en lugar de una mano "fantasma" entre 0 y
+        los landmarks reales que nunca aparece en el entrenamiento.
+        """
+        if self._has_last_landmarks:
+            last = self._last_landmarks.reshape(2, 63)
+            current = landmarks.reshape(2, 63)
+            interp = self._interp_frame.reshape(2, 63)
+            both = last.any(axis=1) & current.any(axis=1)
+            
+            for k in range(1, self.mp_stride):
+                t = k / self.mp_stride
+                interp[:] = current
+                interp[both] = last[both] + (current[both] - last[both]) * t
+                self.push_frame(self._interp_frame)
+        
+        self.push_frame(landmarks)
+        self._last_landmarks[:] = landmarks
+        self._has_last_landmarks = True
+    
+    def get_sequence(self, out=None):
+        """
+        Secuencia en orden cronológico (del más antiguo al más reciente)
+        
+        Args:
+            out: Array (seq_length, 126) opcional donde escribirla sin asignar memoria
+        
+        Returns:
+            np.array: Array de shape (seq_length, 126); solo se construye al predecir
+        """
+        return np.concatenate((self.frame_buffer[self._buf_idx:], self.frame_buffer[:self._buf_idx]), out=out)
+    
     def predict(self, sequence):
         """
         Hace una predicción dado una secuencia de landmarks
@@ -138,115 +368,265 @@ class LiveGestureTester:
         Returns:
             tuple: (gesture_name, confidence)
         """
-        # Normalizar
-        sequence_tensor = torch.FloatTensor(sequence).unsqueeze(0)  # (1, seq_length, 126)
-        sequence_tensor = (sequence_tensor - self.mean) / self.std
-        sequence_tensor = sequence_tensor.to(self.device)
+        # Sin normalizar: el modelo la aplica internamente
+        if sequence is not self._host_np:
+            np.copyto(self._host_np, sequence)
+        if self._dev_buf is not self._host_pinned:
+            # Asíncrona desde memoria pinned; el .item() de abajo sincroniza antes
+            # de que la siguiente predicción vuelva a escribir en _host_pinned
+            self._dev_buf.copy_(self._host_pinned, non_blocking=True)
         
         # Predecir
-        with torch.no_grad():
-            output = self.model(sequence_tensor)
-            probabilities = torch.softmax(output, dim=1)
-            confidence, predicted_class = torch.max(probabilities, 1)
+        if self._graph is not None:
+            # El grafo lee directamente de _dev_buf; .item() sincroniza
+            self._graph.replay()
+            confidence, predicted_class = self._g_conf, self._g_pred
+        else:
+            with torch.no_grad():
+                output = self.model(self._dev_buf).float()  # softmax en FP32
+                probabilities = torch.softmax(output, dim=1)
+                confidence, predicted_class = torch.max(probabilities, 1)
         
-        predicted_id = predicted_class.item()
-        confidence_value = confidence.item()
-        gesture_name = self.id_to_gesture.get(predicted_id, "Desconocido")
+        # La primera .item() sincroniza; la segunda ya no espera a la GPU
+        predicted_id, confidence_value = predicted_class.item(), confidence.item()
+        gesture_name = self.gesture_names[predicted_id]
         
         return gesture_name, confidence_value
     
-    def run(self):
+    def process_frame(self, frame):
         """
-        Ejecuta el loop principal de testing en vivo
+        Procesa un frame: landmarks (1 de cada mp_stride), buffer y predicción periódica
+        
+        Se ejecuta en el hilo de inferencia. Con mp.solutions es el único hilo que usa
+        self.hands y el modelo; en LIVE_STREAM solo envía el frame y el resto ocurre
+        en el callback de MediaPipe.
         """
-        cap = cv2.VideoCapture(0)
+        # Cooldown con el buffer lleno: saltar MediaPipe mientras falte más tiempo
+        # para predecir del que toma renovar las seq_length filas del buffer
+        if self._buf_filled == self.seq_length:
+            remaining = self.prediction_delay - (time.time() - self.last_prediction_time)
+            if remaining > self.seq_length / self.capture_fps + self.resume_margin:
+                # No interpolar a través de la pausa
+                with self._state_lock:
+                    self._has_last_landmarks = False
+                return
         
-        if not cap.isOpened():
-            print("❌ Error: No se pudo abrir la cámara")
+        # Extraer landmarks solo en 1 de cada mp_stride frames
+        self._frame_count += 1
+        if self._frame_count % self.mp_stride != 0:
             return
         
-        print("🎥 Cámara iniciada. Presiona 'q' para salir.\n")
+        if self.live_stream:
+            # Frame RGB nuevo (no el scratch): MediaPipe lo procesa de forma asíncrona.
+            # Los timestamps deben ser estrictamente crecientes
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            timestamp_ms = max(int(time.monotonic() * 1000), self._last_timestamp_ms + 1)
+            self._last_timestamp_ms = timestamp_ms
+            self.hands.detect_async(mp.Image(image_format=mp.ImageFormat.SRGB, data=frame_rgb), timestamp_ms)
+            return
         
-        current_prediction = None
-        current_confidence = 0.0
+        self.handle_landmarks(self.extract_landmarks_from_frame(frame))
+    
+    def handle_landmarks(self, landmarks):
+        """
+        Agrega una detección al buffer y predice si toca
         
-        while True:
+        Args:
+            landmarks: Vector de 126 features, o None si el frame no tenía manos
+        """
+        with self._state_lock:
+            if landmarks is None:
+                # Frame procesado sin manos: no interpolar a través del hueco
+                self._has_last_landmarks = False
+                return
+            
+            # Agregar al buffer (mantiene solo los últimos seq_length frames)
+            self.push_landmarks(landmarks)
+            
+            # Si tenemos suficientes frames y ha pasado el delay
+            current_time = time.time()
+            if self._buf_filled == self.seq_length:
+                if current_time - self.last_prediction_time >= self.prediction_delay:
+                    # Hacer predicción
+                    # Directo al staging pinned: predict no necesita copiarla de nuevo
+                    sequence = self.get_sequence(out=self._host_np)
+                    gesture, confidence = self.predict(sequence)
+                    
+                    self.current_prediction = gesture
+                    self.current_confidence = confidence
+                    
+                    # Mostrar en terminal
+                    print(f"\n{'='*70}")
+                    print(f"🎯 Predicción: {gesture.upper()}")
+                    print(f"📊 Confianza: {confidence*100:.2f}%")
+                    print(f"{'='*70}\n")
+                    
+                    self.last_prediction_time = current_time
+    
+    def _capture_loop(self, cap, frame_queue):
+        """Hilo productor: lee la cámara y deja en cola solo los frames más recientes"""
+        while not self._stop.is_set():
             ret, frame = cap.read()
             if not ret:
                 print("❌ Error al capturar frame")
+                self._stop.set()
                 break
+            put_latest(frame_queue, frame)
+    
+    def _inference_loop(self, frame_queue, display_queue):
+        """Hilo de MediaPipe + modelo: toma frames de la cámara y los pasa a la UI ya procesados"""
+        while not self._stop.is_set():
+            try:
+                frame = frame_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self.process_frame(frame)
+            put_latest(display_queue, frame)
+    
+    def _overlay_texts(self):
+        """
+        Textos del overlay, reconstruidos solo cuando cambia el valor que muestran
+        
+        Returns:
+            tuple: (prediction_text, buffer_text, timer_text); None si no se muestra
+        """
+        prediction_key = (self.current_prediction, self.current_confidence)
+        if prediction_key != self._overlay_prediction_key:
+            self._overlay_prediction_key = prediction_key
+            self._overlay_prediction_text = (
+                f"{self.current_prediction}: {self.current_confidence*100:.1f}%"
+                if self.current_prediction else None
+            )
+        
+        if self._buf_filled != self._overlay_buffer_key:
+            self._overlay_buffer_key = self._buf_filled
+            self._overlay_buffer_text = f"Buffer: {self._buf_filled}/{self.seq_length}"
+        
+        timer_text = None
+        if self._buf_filled == self.seq_length:
+            # El temporizador se muestra en décimas: solo cambia unas 10 veces por segundo
+            time_remaining = max(0, self.prediction_delay - (time.time() - self.last_prediction_time))
+            tenths = int(time_remaining * 10)
+            if tenths != self._overlay_timer_key:
+                self._overlay_timer_key = tenths
+                self._overlay_timer_text = f"Proxima: {tenths / 10:.1f}s"
+            timer_text = self._overlay_timer_text
+        
+        return self._overlay_prediction_text, self._overlay_buffer_text, timer_text
+    
+    def draw_overlay(self, frame):
+        """Dibuja predicción, estado del buffer y temporizador sobre el frame"""
+        prediction_text, buffer_text, timer_text = self._overlay_texts()
+        bottom = frame.shape[0]
+        
+        # Mostrar predicción en frame
+        if prediction_text:
+            cv2.putText(
+                frame, prediction_text, (10, 30), 
+                cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2
+            )
+        
+        # Mostrar contador de frames en buffer
+        cv2.putText(
+            frame, buffer_text, (10, bottom - 20), 
+            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2
+        )
+        
+        # Mostrar tiempo restante para próxima predicción
+        if timer_text:
+            cv2.putText(
+                frame, timer_text, (10, bottom - 50), 
+                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2
+            )
+    
+    def _stop_workers(self, workers):
+        """Señala el fin del pipeline y espera a que los hilos terminen su iteración actual"""
+        self._stop.set()
+        for worker in workers:
+            worker.join()
+    
+    def run(self):
+        """
+        Ejecuta el loop principal de testing en vivo
+        
+        Pipeline de tres etapas conectadas por colas acotadas: captura (hilo),
+        MediaPipe + modelo (hilo) y visualización (hilo principal, requerido por
+        cv2.imshow). Así la cámara no queda limitada por la etapa más lenta.
+        
+        Los recursos se liberan con un ExitStack, también ante errores: primero se
+        detienen los hilos y después se cierran ventana, MediaPipe y cámara, para
+        que una nueva prueba pueda volver a abrir la cámara de inmediato.
+        """
+        self._stop = threading.Event()
+        
+        with contextlib.ExitStack() as stack:
+            cap = cv2.VideoCapture(0)
+            stack.callback(cap.release)
+            stack.callback(self.hands.close)
             
-            # Extraer landmarks
-            landmarks = self.extract_landmarks_from_frame(frame)
+            if not cap.isOpened():
+                print("❌ Error: No se pudo abrir la cámara")
+                return
             
-            if landmarks is not None:
-                # Agregar al buffer
-                self.frame_buffer.append(landmarks)
-                
-                # Mantener solo los últimos seq_length frames
-                if len(self.frame_buffer) > self.seq_length:
-                    self.frame_buffer.pop(0)
-                
-                # Si tenemos suficientes frames y ha pasado el delay
-                current_time = time.time()
-                if len(self.frame_buffer) == self.seq_length:
-                    if current_time - self.last_prediction_time >= self.prediction_delay:
-                        # Hacer predicción
-                        sequence = np.array(self.frame_buffer)
-                        gesture, confidence = self.predict(sequence)
-                        
-                        current_prediction = gesture
-                        current_confidence = confidence
-                        
-                        # Mostrar en terminal
-                        print(f"\n{'='*70}")
-                        print(f"🎯 Predicción: {gesture.upper()}")
-                        print(f"📊 Confianza: {confidence*100:.2f}%")
-                        print(f"{'='*70}\n")
-                        
-                        self.last_prediction_time = current_time
+            # Entregar siempre el frame más reciente en lugar de uno encolado por el driver
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAPTURE_WIDTH)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAPTURE_HEIGHT)
             
-            # Mostrar predicción en frame
-            if current_prediction:
-                text = f"{current_prediction}: {current_confidence*100:.1f}%"
-                cv2.putText(
-                    frame, text, (10, 30), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2
-                )
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            if fps and fps > 0:
+                self.capture_fps = fps
             
-            # Mostrar contador de frames en buffer
-            buffer_text = f"Buffer: {len(self.frame_buffer)}/{self.seq_length}"
-            cv2.putText(
-                frame, buffer_text, (10, frame.shape[0] - 20), 
-                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2
-            )
+            print("🎥 Cámara iniciada. Presiona 'q' para salir.\n")
             
-            # Mostrar tiempo restante para próxima predicción
-            if len(self.frame_buffer) == self.seq_length:
-                time_remaining = max(0, self.prediction_delay - (current_time - self.last_prediction_time))
-                timer_text = f"Proxima: {time_remaining:.1f}s"
-                cv2.putText(
-                    frame, timer_text, (10, frame.shape[0] - 50), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2
-                )
+            self.current_prediction = None
+            self.current_confidence = 0.0
             
-            # Mostrar frame
-            cv2.imshow('Helen - Test en Vivo (Presiona Q para salir)', frame)
+            # Caché de textos del overlay (ver _overlay_texts)
+            self._overlay_prediction_key = self._overlay_buffer_key = self._overlay_timer_key = None
+            self._overlay_prediction_text = self._overlay_buffer_text = self._overlay_timer_text = None
             
-            # Salir con 'q'
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                print("\n✅ Cerrando test en vivo...")
-                break
-        
-        cap.release()
-        cv2.destroyAllWindows()
-        self.hands.close()
+            stack.callback(cv2.destroyAllWindows)
+            
+            frame_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+            display_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+            workers = [
+                threading.Thread(target=self._capture_loop, args=(cap, frame_queue), daemon=True),
+                threading.Thread(target=self._inference_loop, args=(frame_queue, display_queue), daemon=True),
+            ]
+            # Registrado al final: es lo primero que se ejecuta al salir
+            stack.callback(self._stop_workers, workers)
+            for worker in workers:
+                worker.start()
+            
+            while not self._stop.is_set():
+                try:
+                    frame = display_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                
+                self.draw_overlay(frame)
+                
+                # Mostrar frame
+                cv2.imshow('Helen - Test en Vivo (Presiona Q para salir)', frame)
+                
+                # Salir con 'q'
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    print("\n✅ Cerrando test en vivo...")
+                    break
 
 
 def main():
     """
     Función principal para ejecutar el test en vivo
     """
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Probar el modelo de gestos en tiempo real')
+    parser.add_argument('--landmarker-model', type=str, default=None,
+                      help='Ruta a hand_landmarker.task para usar MediaPipe Tasks en modo LIVE_STREAM')
+    args = parser.parse_args()
+    
     # Rutas por defecto (ajustar según tu estructura)
     model_path = Path("trained_models/model_final.pth")
     gestures_map_path = Path("data/gestures_map.json")
@@ -266,7 +646,7 @@ def main():
         return
     
     # Crear tester y ejecutar
-    tester = LiveGestureTester(model_path, gestures_map_path, norm_stats_path)
+    tester = LiveGestureTester(model_path, gestures_map_path, norm_stats_path, args.landmarker_model)
     tester.run()
 
 
@@ -99,6 +99,7 @@ class GestureRecognitionController:
         #* Paths para guardar
         model_path = self.base_dir / "trained_models" / "model_final.pth"
         norm_stats_path = self.base_dir / "trained_models" / "normalization_stats.pth"
+        scripted_path = self.base_dir / "trained_models" / "model_final.script.pt"
         
         try:
             #* Ejecutar entrenamiento
@@ -106,7 +107,8 @@ class GestureRecognitionController:
                 epochs=params['epochs'],
                 batch_size=params['batch_size'],
                 model_save_path=model_path,
-                norm_stats_path=norm_stats_path
+                norm_stats_path=norm_stats_path,
+                scripted_save_path=scripted_path
             ):
                 #* Mostrar progreso
                 self.ui.show_progress(
@@ -283,27 +285,21 @@ class GestureRecognitionController:
         )
         
         try:
-            #* Ejecutar script de testing en vivo
-            test_script = self.base_dir / "test_model_live.py"
+            #* Ejecutar el test en vivo en este mismo proceso: torch, cv2 y mediapipe
+            #* se importan una sola vez en vez de arrancar un intérprete nuevo por prueba
+            from test_model_live import LiveGestureTester
             
-            if not test_script.exists():
-                self.ui.show_message(
-                    "⚠️  No se encontró test_model_live.py en el directorio base.\n"
-                    "    Asegúrate de que el archivo exista.",
-                    "error"
-                )
-                return
-            
-            subprocess.run([sys.executable, str(test_script)])
+            tester = LiveGestureTester(model_path, gestures_map_path, norm_stats_path)
+            tester.run()
             
             self.ui.show_message(
                 "✅ Prueba en vivo finalizada",
                 "success"
             )
             
-        except FileNotFoundError:
+        except ImportError as e:
             self.ui.show_message(
-                "No se encontró test_model_live.py",
+                f"No se pudo cargar test_model_live.py: {e}",
                 "error"
             )
         except Exception as e:
@@ -325,34 +321,26 @@ class GestureRecognitionController:
         )
         
         try:
-            data_prep_script = self.base_dir / "data_prep.py"
+            #* Ejecutar el preprocesamiento en este mismo proceso (sin intérprete nuevo);
+            #* su progreso se imprime directamente en la terminal
+            from data_prep import load_and_process_data
             
-            #* Ejecutar data_prep.py con los parámetros correctos
-            result = subprocess.run([
-                sys.executable,
-                str(data_prep_script),
-                "--dataset", self.dataset_path,
-                "--output", str(self.base_dir),
-                "--seq-length", "40"
-            ], capture_output=True, text=True)
+            load_and_process_data(
+                self.dataset_path,
+                str(self.base_dir),
+                seq_length=40,
+                progress_callback=self._report_data_prep_progress
+            )
             
-            #* Mostrar output
-            if result.returncode == 0:
-                self.ui.show_message(
-                    "Preprocesamiento completado exitosamente.\n"
-                    "Los archivos X_data.npy, Y_labels.npy y gestures_map.json han sido actualizados.",
-                    "success"
-                )
-                print(result.stdout)  #* Mostrar output del script
-            else:
-                self.ui.show_message(
-                    f"❌ Error al ejecutar data_prep.py:\n{result.stderr}",
-                    "error"
-                )
+            self.ui.show_message(
+                "Preprocesamiento completado exitosamente.\n"
+                "Los archivos X_data.npy, Y_labels.npy y gestures_map.json han sido actualizados.",
+                "success"
+            )
                 
-        except FileNotFoundError:
+        except ImportError as e:
             self.ui.show_message(
-                "No se encontró data_prep.py en el directorio base",
+                f"No se pudo cargar data_prep.py: {e}",
                 "error"
             )
         except Exception as e:
@@ -362,6 +350,16 @@ class GestureRecognitionController:
             )
 
 
+    def _report_data_prep_progress(self, done: int, total: int) -> None:
+        """Muestra el avance del preprocesamiento en la UI cada 10% de los videos"""
+        step = max(1, total // 10)
+        if done == total or done % step == 0:
+            self.ui.show_message(
+                f"Preprocesamiento: {done}/{total} videos ({done * 100 // total}%)",
+                "info"
+            )
+
+
 def create_application(base_dir: str = ".") -> GestureRecognitionController:
     """
     Factory function para crear la aplicación con todas las dependencias configuradas
@@ -3,12 +3,23 @@ Script de Prueba del Sistema Helen
 Verifica que el modelo y API funcionen correctamente
 """
 
+import functools
+import tempfile
+import time
 import torch
 import numpy as np
 import json
+import os
 from pathlib import Path
+import struct
 import sys
 
+# ONNX Runtime es opcional: sin él se omite el test de export ONNX
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
 # Agregar paths
 # Agregar paths (usar nombres reales de carpetas del repo)
 sys.path.append('ml-service')
@@ -73,9 +84,10 @@ def test_data_preparation():
             print("⚠️  X_data.npy no encontrado (ejecuta data_prep.py primero)")
             return False
         
-        # Cargar datos
-        X = np.load(x_path)
-        Y = np.load(y_path)
+        # Cargar datos mapeados en memoria: el test solo inspecciona las formas,
+        # así que no hace falta leer los arrays completos
+        X = np.load(x_path, mmap_mode='r')
+        Y = np.load(y_path, mmap_mode='r')
         
         with open(gestures_path, 'r') as f:
             gestures_map = json.load(f)
@@ -100,6 +112,60 @@ def test_data_preparation():
         return False
 
 
+@functools.lru_cache(maxsize=None)
+def load_gestures(gestures_path):
+    """Carga gestures_map.json una sola vez; devuelve (gestures_map, mapeo inverso ID -> nombre)"""
+    with open(gestures_path, 'r') as f:
+        gestures_map = json.load(f)
+    gestures_inv = {v: k for k, v in gestures_map.items()}
+    return gestures_map, gestures_inv
+
+
+def input_shape(default_seq_length=40):
+    """
+    Forma (seq_length, n_features) de una secuencia, leída de los datos reales
+    
+    Usa X_data.npy (memmap, solo la cabecera) y, si no existe, el tamaño de
+    la media en normalization_stats.pth; los literales son el último recurso.
+    """
+    x_path = Path('ml-service/data/X_data.npy')
+    if x_path.exists():
+        X = np.load(x_path, mmap_mode='r')
+        return int(X.shape[1]), int(X.shape[2])
+    
+    stats_path = Path('ml-service/trained_models/normalization_stats.pth')
+    if stats_path.exists():
+        stats = torch.load(stats_path, map_location='cpu')
+        return default_seq_length, int(torch.as_tensor(stats['mean']).numel())
+    
+    return default_seq_length, 126
+
+
+@functools.lru_cache(maxsize=None)
+def load_model(model_path, n_classes, seq_length, n_features, quantized=False, warmup_iters=3):
+    """
+    Carga el modelo una sola vez: FP32 eager (lo que sirve la API en GPU) o INT8 trazado
+    
+    Con quantized=True se aplica cuantización dinámica INT8 y se traza con
+    TorchScript: en CPU con batch 1 el LSTM está limitado por la lectura de
+    pesos, así que int8 reduce la latencia. La entrada es de forma fija
+    (1, seq_length, n_features): el módulo calentado se reutiliza en cada
+    ejecución posterior del test.
+    """
+    model = GestureNet(output_size=n_classes)
+    model.load_state_dict(torch.load(model_path, map_location='cpu'))
+    model.eval()
+    
+    dummy = torch.randn(1, seq_length, n_features)
+    with torch.no_grad():
+        if quantized:
+            model = model.quantize()  # BN fusionado + INT8 para LSTM y Linear (sobre una copia)
+            model = torch.jit.trace(model, dummy)
+        for _ in range(warmup_iters):
+            model(dummy)
+    return model
+
+
 def test_model_inference():
     """Test 3: Verificar inferencia del modelo"""
     print("\n" + "="*70)
@@ -114,34 +180,38 @@ def test_model_inference():
             print("⚠️  model_final.pth no encontrado (entrena el modelo primero)")
             return False
         
-        # Cargar mapeo
-        with open(gestures_path, 'r') as f:
-            gestures_map = json.load(f)
+        # Batch 1: más hilos solo añaden overhead de sincronización
+        torch.set_num_threads(1)
         
+        # Cargar mapeo y modelo (cacheados entre ejecuciones)
+        gestures_map, gestures_inv = load_gestures(gestures_path)
         n_classes = len(gestures_map)
-        
-        # Cargar modelo
-        model = GestureNet(output_size=n_classes)
-        model.load_state_dict(torch.load(model_path, map_location='cpu'))
-        model.eval()
+        seq_length, n_features = input_shape()
         
         # Crear datos de prueba
-        x_test = torch.randn(1, 40, 126)  # 1 secuencia
-        
-        # Inferencia
-        with torch.no_grad():
-            logits = model(x_test)
-            probs = torch.softmax(logits, dim=1)
-            pred = torch.argmax(probs, dim=1).item()
-        
-        # Mapeo inverso
-        gestures_inv = {v: k for k, v in gestures_map.items()}
-        predicted_gesture = gestures_inv[pred]
-        
-        print(f"✅ Inferencia OK")
-        print(f"  Logits shape: {logits.shape}")
-        print(f"  Predicción: {predicted_gesture} (ID: {pred})")
-        print(f"  Confianza: {probs[0, pred].item():.4f}")
+        x_test = torch.randn(1, seq_length, n_features)  # 1 secuencia
+        
+        # FP32 eager (el que sirve la API en GPU) e INT8 trazado (CPU)
+        predictions = {}
+        for label, quantized in (('FP32', False), ('INT8', True)):
+            model = load_model(model_path, n_classes, seq_length, n_features, quantized)
+            with torch.no_grad():
+                logits = model(x_test)
+            
+            assert logits.shape == (1, n_classes), f"Shape incorrecto ({label}): {logits.shape}"
+            # softmax es monótona: argmax sobre los logits da la misma clase
+            pred = torch.argmax(logits, dim=1).item()
+            # Probabilidad solo de la fila reportada
+            confidence = torch.softmax(logits[0], dim=0)[pred].item()
+            predictions[label] = pred
+            
+            print(f"✅ Inferencia {label} OK")
+            print(f"  Logits shape: {logits.shape}")
+            print(f"  Predicción: {gestures_inv[pred]} (ID: {pred})")
+            print(f"  Confianza: {confidence:.4f}")
+        
+        if predictions['FP32'] != predictions['INT8']:
+            print("  ⚠️  FP32 e INT8 difieren en esta entrada aleatoria")
         
         return True
         
@@ -157,16 +227,16 @@ def test_api_structure():
     print("="*70)
     
     try:
+        # Un solo listado del directorio en lugar de un stat por archivo
+        api_files = {entry.name for entry in os.scandir('api')} if os.path.isdir('api') else set()
+        
         required_files = [
-            'api/model.py',
-            'api/api_service.py',
-            'api/requirements.txt'
+            'model.py',
+            'api_service.py',
+            'requirements.txt'
         ]
         
-        missing = []
-        for file in required_files:
-            if not Path(file).exists():
-                missing.append(file)
+        missing = [f"api/{file}" for file in required_files if file not in api_files]
         
         if missing:
             print(f"❌ Archivos faltantes:")
@@ -181,16 +251,15 @@ def test_api_structure():
         
         # Verificar archivos del modelo
         model_files = [
-            'api/model_final.pth',
-            'api/gestures_map.json',
-            'api/normalization_stats.pth'
+            'model_final.pth',
+            'gestures_map.json',
+            'normalization_stats.pth'
         ]
         
         print(f"\n  Archivos del modelo:")
         for file in model_files:
-            exists = Path(file).exists()
-            symbol = "✓" if exists else "✗"
-            print(f"  {symbol} {Path(file).name}")
+            symbol = "✓" if file in api_files else "✗"
+            print(f"  {symbol} {file}")
         
         return True
         
@@ -206,22 +275,26 @@ def test_api_mock_request():
     print("="*70)
     
     try:
-        # Simular secuencia de entrada
-        sequence = np.random.rand(40, 126).tolist()
+        # Simular secuencia de entrada en float16, sin listas de floats de Python
+        sequence = np.random.rand(40, 126).astype(np.float16)
         
-        request_json = {
-            "sequence": sequence
-        }
+        # Payload binario de /predict (application/octet-stream, ?dtype=float16):
+        # cabecera (frames, features) como 2 x uint32 little-endian + valores
+        payload = struct.pack('<II', *sequence.shape) + sequence.astype('<f2').tobytes()
         
-        # Validar estructura
-        assert isinstance(request_json['sequence'], list)
-        assert len(request_json['sequence']) == 40
-        assert len(request_json['sequence'][0]) == 126
+        # Validar estructura decodificando como lo hace la API
+        n_frames, n_features = struct.unpack_from('<II', payload)
+        decoded = np.frombuffer(payload, dtype='<f2', offset=8).astype(np.float32)
+        decoded = decoded.reshape(n_frames, n_features)
+        assert decoded.shape == (40, 126)
+        assert np.array_equal(decoded, sequence.astype(np.float32))
+        
+        json_size = len(json.dumps({"landmarks": sequence.astype(np.float32).tolist()}))
         
         print(f"✅ Estructura de request válida")
-        print(f"  Formato: JSON")
+        print(f"  Formato: binario float16 (application/octet-stream)")
         print(f"  Secuencia: 40 frames x 126 features")
-        print(f"  Tamaño estimado: {len(str(request_json))} bytes")
+        print(f"  Tamaño: {len(payload)} bytes (JSON equivalente: {json_size} bytes)")
 
         return True
         
@@ -230,6 +303,83 @@ def test_api_mock_request():
         return False
 
 
+def benchmark_ms(fn, iters=100):
+    """Latencia media de fn() en milisegundos (después de una llamada de calentamiento)"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(iters):
+        fn()
+    return (time.perf_counter() - start) * 1000 / iters
+
+
+def test_onnx_export():
+    """Test 6: Exportar a ONNX con forma fija y comparar latencia contra PyTorch"""
+    print("\n" + "="*70)
+    print("🧪 TEST 6: Export ONNX")
+    print("="*70)
+    
+    if ort is None:
+        print("⚠️  onnxruntime no instalado, se omite el test (pip install onnxruntime)")
+        return True
+    
+    try:
+        model_path = Path('ml-service/trained_models/model_final.pth')
+        gestures_path = Path('ml-service/data/gestures_map.json')
+        
+        if not model_path.exists():
+            print("⚠️  model_final.pth no encontrado (entrena el modelo primero)")
+            return False
+        
+        gestures_map, _ = load_gestures(gestures_path)
+        n_classes = len(gestures_map)
+        
+        # Modelo FP32 (la cuantización dinámica no se exporta a ONNX)
+        model = GestureNet(output_size=n_classes)
+        model.load_state_dict(torch.load(model_path, map_location='cpu'))
+        model.prepare_for_inference()
+        
+        x_test = torch.randn(1, 40, 126)
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # Forma fija (1, 40, 126): ONNX Runtime puede plegar constantes y fusionar todo el grafo
+            onnx_path = Path(tmp_dir) / 'model.onnx'
+            torch.onnx.export(
+                model, x_test, str(onnx_path),
+                input_names=['x'],
+                output_names=['logits'],
+                opset_version=17,
+                do_constant_folding=True
+            )
+            
+            sess_options = ort.SessionOptions()
+            sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            sess_options.intra_op_num_threads = 1  # Mismo número de hilos que el test 3
+            session = ort.InferenceSession(
+                str(onnx_path), sess_options=sess_options, providers=['CPUExecutionProvider']
+            )
+        
+        x_numpy = x_test.numpy()
+        onnx_logits = session.run(None, {'x': x_numpy})[0]
+        
+        with torch.no_grad():
+            torch_logits = model(x_test).numpy()
+            torch_ms = benchmark_ms(lambda: model(x_test))
+        onnx_ms = benchmark_ms(lambda: session.run(None, {'x': x_numpy}))
+        
+        assert onnx_logits.shape == (1, n_classes), f"Shape incorrecto: {onnx_logits.shape}"
+        assert np.allclose(onnx_logits, torch_logits, atol=1e-4), "Las salidas ONNX y PyTorch difieren"
+        
+        print(f"✅ Export ONNX OK")
+        print(f"  Latencia PyTorch (eager FP32): {torch_ms:.3f} ms")
+        print(f"  Latencia ONNX Runtime: {onnx_ms:.3f} ms ({torch_ms / onnx_ms:.1f}x)")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+
 def run_all_tests():
     """Ejecutar todos los tests"""
     print("\n" + "="*70)
@@ -241,7 +391,8 @@ def run_all_tests():
         ("Preparación de Datos", test_data_preparation),
         ("Inferencia del Modelo", test_model_inference),
         ("Estructura de API", test_api_structure),
-        ("Mock Request a API", test_api_mock_request)
+        ("Mock Request a API", test_api_mock_request),
+        ("Export ONNX", test_onnx_export)
     ]
     
     results = []